@@ -8,7 +8,7 @@ import importlib, passdb; importlib.reload(passdb)
 
 from .pdatabase import ADatabase
 from .phashing import PHasher
-from .poly import CRC32
+from .poly import CRC32, CRC32C, CRCCache
 
 
 COMPAT_PWORD_VERSION = "1.22 16"
@@ -18,5 +18,7 @@ VERSION = "1.30 21"
 __all__ = [
     "ADatabase",
     "CRC32",
+    "CRC32C",
+    "CRCCache",
     "PHasher",
 ]
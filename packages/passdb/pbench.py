@@ -0,0 +1,140 @@
+#!/usr/bin/python3
+# pbench.py  (c)2026  Henrique Moreira
+
+""" Scale benchmark: time and peak memory per phase, as JSON
+"""
+
+# pylint: disable=missing-function-docstring
+
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import passdb
+from passdb import pgenerate
+from pword import pcheckers
+from pword.milot import MiLot
+
+
+def main():
+    """ Main script """
+    code = run_main(sys.argv[1:])
+    if code is None:
+        print(f"""Usage:
+
+python {__file__} [options] [DIR]
+
+Generates a synthetic database (at DIR, or a temporary directory) and
+benchmarks ADatabase, MiLot, PHasher and pcheckers on it.
+
+Options are:
+  -n NUM            Number of accounts (default: 10000)
+  -c RATE           CRC32 clash rate
+  -j FILE           Write results (JSON) to FILE
+  -m                Skip peak memory measure (tracemalloc slows down)
+""")
+    sys.exit(code if code else 0)
+
+
+def run_main(args):
+    n_accs, clash_rate, out, mem = 10000, 0.0, "", True
+    param = args
+    while param and param[0].startswith("-"):
+        if param[0] == "-m":
+            mem = False
+            del param[0]
+            continue
+        if len(param) < 2:
+            return None
+        if param[0] == "-n":
+            n_accs = int(param[1])
+        elif param[0] == "-c":
+            clash_rate = float(param[1])
+        elif param[0] == "-j":
+            out = param[1]
+        else:
+            return None
+        del param[:2]
+    if len(param) > 1:
+        return None
+    if param:
+        res = run_bench(param[0], n_accs, clash_rate, mem)
+    else:
+        with tempfile.TemporaryDirectory() as path:
+            res = run_bench(path, n_accs, clash_rate, mem)
+    for name, item in res["phases"].items():
+        peak = item.get("peak_bytes")
+        s_peak = "" if peak is None else f"{peak / (1024 * 1024):9.1f} MiB"
+        s_note = item.get("error", item.get("skipped", ""))
+        print(f"{name:<28} {item['secs'] * 1000:10.1f} ms {s_peak:>13}  {s_note}")
+    if out:
+        with open(out, "w", encoding="ascii") as fdout:
+            json.dump(res, fdout, indent=2, sort_keys=True)
+            fdout.write("\n")
+    return 0
+
+
+def run_bench(path, n_accs, clash_rate=0.0, mem=True) -> dict:
+    """ Returns the benchmark results (dict), JSON-friendly. """
+    res = {
+        "version": passdb.VERSION,
+        "python": platform.python_version(),
+        "when": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "params": {"accounts": n_accs, "clash_rate": clash_rate},
+        "phases": {},
+    }
+    phases = res["phases"]
+    counts = _phase(phases, "generate", mem, pgenerate.generate, path,
+                    accounts=n_accs, clash_rate=clash_rate)
+    res["rows"] = counts
+    config = f"{path}/config"
+    adb = _phase(phases, "adb.load", mem, passdb.ADatabase, config)
+    if adb is not None:
+        # Per-phase split, from a second load (wall time only)
+        prof = passdb.ADatabase(config, profile="time").profile()
+        for name, item in prof.items():
+            phases[f"adb.load.{name}"] = {"secs": item["secs"], "rows": item["rows"]}
+    cpt = _phase(phases, "adb.load-compact", mem, passdb.ADatabase, config, compact=True)
+    if cpt is not None:
+        phases["adb.load-compact"]["bytes_per_account"] = cpt.footprint()["per-account"]
+    if adb is not None:
+        phases["adb.load"]["bytes_per_account"] = adb.footprint()["per-account"]
+    _phase(phases, "adb.lazy-upkeys", mem,
+           lambda: passdb.ADatabase(config, lazy=True).upkeys("users"))
+    mis = MiLot(alt_tables=True)
+    _phase(phases, "milot.process_path-jobs4", mem, MiLot(alt_tables=True).process_path,
+           path, jobs=4)
+    _phase(phases, "milot.process_path", mem, mis.process_path, path)
+    if adb is not None:
+        _phase(phases, "phasher.builder", mem, passdb.PHasher(adb).builder)
+    else:
+        phases["phasher.builder"] = {"secs": 0.0, "skipped": "adb.load failed"}
+    _phase(phases, "pcheckers.best_rank_match", mem,
+           pcheckers.best_rank_match, mis, "Acc0000")
+    return res
+
+
+def _phase(phases, name, mem, func, *args, **kwargs):
+    """ Runs func(), storing time (and peak memory) at phases[name]. """
+    if mem:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result, error = None, ""
+    try:
+        result = func(*args, **kwargs)
+    except AssertionError as err:
+        error = f"AssertionError: {err}"
+    item = {"secs": time.perf_counter() - start}
+    if mem:
+        item["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    if error:
+        item["error"] = error
+    phases[name] = item
+    return result
+
+
+if __name__ == "__main__":
+    main()
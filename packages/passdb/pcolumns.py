@@ -0,0 +1,246 @@
+# pcolumns.py  (c)2026  Henrique Moreira
+
+""" Compact (columnar) account records, and CRC buckets, for ADatabase trees
+"""
+
+# pylint: disable=missing-function-docstring
+
+import sys
+from array import array
+from collections.abc import Mapping
+
+
+class Interner:
+    """ Strings to small integer ids, and back. """
+    __slots__ = ("strs", "ids")
+
+    def __init__(self):
+        self.strs, self.ids = [], {}
+
+    def __len__(self):
+        return len(self.strs)
+
+    def intern(self, astr: str) -> int:
+        idx = self.ids.get(astr)
+        if idx is None:
+            idx = len(self.strs)
+            self.ids[astr] = idx
+            self.strs.append(astr)
+        return idx
+
+
+class AccRecord:
+    """ Account referencing a pass reference: (key, user, crc) """
+    __slots__ = ("key", "user", "crc")
+
+    def __init__(self, key, user, crc):
+        self.key, self.user, self.crc = key, user, crc
+
+    def __getitem__(self, idx):
+        return (self.key, self.user, self.crc)[idx]
+
+    def __iter__(self):
+        return iter((self.key, self.user, self.crc))
+
+    def __len__(self):
+        return 3
+
+    def __eq__(self, other):
+        return tuple(self) == tuple(other)
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        return repr(tuple(self))
+
+
+class AccountColumns(Mapping):
+    """ Read-only accounts branch: key -> (user, p_ref),
+    stored as interned user/ pass reference ids in integer arrays.
+    """
+    __slots__ = ("_index", "titles", "users", "prefs", "user_col", "pref_col")
+
+    def __init__(self):
+        self._index = {}	# key -> row
+        self.titles = []
+        self.users, self.prefs = Interner(), Interner()
+        self.user_col, self.pref_col = array("I"), array("I")
+
+    def __getitem__(self, key):
+        row = self._index[key]
+        return (
+            self.users.strs[self.user_col[row]],
+            self.prefs.strs[self.pref_col[row]],
+        )
+
+    def __iter__(self):
+        return iter(self.titles)
+
+    def __len__(self):
+        return len(self.titles)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def add(self, key, value):
+        """ Appends one account; only used while loading. """
+        user, p_ref = value
+        assert key not in self._index, f"Duplicate account: {key}"
+        self._index[key] = len(self.titles)
+        self.titles.append(key)
+        self.user_col.append(self.users.intern(user))
+        self.pref_col.append(self.prefs.intern(p_ref))
+
+    def row(self, key) -> int:
+        return self._index[key]
+
+
+class RawValueView(Mapping):
+    """ Read-only key -> 'user;p_ref' strings, as read from accs.mi """
+    __slots__ = ("_cols",)
+
+    def __init__(self, cols):
+        self._cols = cols
+
+    def __getitem__(self, key):
+        return ";".join(self._cols[key])
+
+    def __iter__(self):
+        return iter(self._cols)
+
+    def __len__(self):
+        return len(self._cols)
+
+    def __contains__(self, key):
+        return key in self._cols
+
+
+class PassRefView(Mapping):
+    """ Read-only tree 'd': p_ref -> [(key, user, crc), ...]
+    Account rows are grouped per pass reference (offsets + rows arrays),
+    records are only created when a pass reference is looked up.
+    """
+    __slots__ = ("_cols", "crcs", "_offsets", "_rows")
+
+    def __init__(self, cols, crcs):
+        n_prefs = len(cols.prefs)
+        assert len(crcs) == n_prefs, "crcs"
+        self._cols = cols
+        self.crcs = crcs	# array('I'), one CRC32 per pass id
+        offsets = array("I", bytes(4 * (n_prefs + 1)))
+        for pid in cols.pref_col:
+            offsets[pid + 1] += 1
+        for pid in range(n_prefs):
+            offsets[pid + 1] += offsets[pid]
+        rows = array("I", bytes(4 * len(cols.pref_col)))
+        fill = array("I", offsets)
+        for row, pid in enumerate(cols.pref_col):
+            rows[fill[pid]] = row
+            fill[pid] += 1
+        self._offsets, self._rows = offsets, rows
+
+    def __getitem__(self, p_ref):
+        cols = self._cols
+        pid = cols.prefs.ids[p_ref]
+        h_crc = f"{self.crcs[pid]:08X}"
+        return [
+            AccRecord(cols.titles[row], cols.users.strs[cols.user_col[row]], h_crc)
+            for row in self._rows[self._offsets[pid]:self._offsets[pid + 1]]
+        ]
+
+    def __iter__(self):
+        return iter(self._cols.prefs.strs)
+
+    def __len__(self):
+        return len(self._cols.prefs)
+
+    def __contains__(self, p_ref):
+        return p_ref in self._cols.prefs.ids
+
+
+class CRCBuckets:
+    """ CRC32 buckets of pass references (tree 'e'), kept together with
+    tree 'f' and the clash counters (tree 'j': bucket size -> buckets).
+    Insert and remove are O(1), per account.
+    """
+    __slots__ = ("buckets", "flat", "sizes", "clashing", "_uses")
+
+    def __init__(self):
+        self.buckets = {}	# h_crc -> set(p_ref)
+        self.flat = {}		# f"{h_crc}.{n}" -> tuple
+        self.sizes = {1: 0, 2: 0, 3: 0}
+        self.clashing = set()	# h_crc with more than one pass reference
+        self._uses = {}		# p_ref -> number of accounts using it
+
+    def insert(self, h_crc: str, p_ref: str):
+        """ One more account using 'p_ref'. """
+        n_uses = self._uses.get(p_ref, 0)
+        self._uses[p_ref] = n_uses + 1
+        if n_uses:
+            return
+        bucket = self.buckets.get(h_crc)
+        if bucket is None:
+            bucket = set()
+            self.buckets[h_crc] = bucket
+        self._resize(h_crc, bucket, p_ref, True)
+
+    def remove(self, h_crc: str, p_ref: str):
+        """ One less account using 'p_ref'. """
+        n_uses = self._uses[p_ref] - 1
+        if n_uses:
+            self._uses[p_ref] = n_uses
+            return
+        del self._uses[p_ref]
+        bucket = self.buckets[h_crc]
+        self._resize(h_crc, bucket, p_ref, False)
+        if not bucket:
+            del self.buckets[h_crc]
+
+    def clashes(self) -> int:
+        """ Returns the number of buckets with more than one pass reference. """
+        return len(self.clashing)
+
+    def report(self) -> list:
+        """ Returns [(h_crc, [p_ref, ...]), ...] for clashing buckets. """
+        return [
+            (h_crc, sorted(self.buckets[h_crc])) for h_crc in sorted(self.clashing)
+        ]
+
+    def _resize(self, h_crc, bucket, p_ref, add):
+        old = len(bucket)
+        if old:
+            self.sizes[old] -= 1
+            del self.flat[f"{h_crc}.{old}"]
+        if add:
+            bucket.add(p_ref)
+        else:
+            bucket.discard(p_ref)
+        new = len(bucket)
+        if new:
+            self.sizes[new] = self.sizes.get(new, 0) + 1
+            self.flat[f"{h_crc}.{new}"] = tuple(sorted(bucket))
+        if new > 1:
+            self.clashing.add(h_crc)
+        else:
+            self.clashing.discard(h_crc)
+
+
+def deep_sizeof(obj, seen=None) -> int:
+    """ Returns the (approximate) bytes held by 'obj' and everything it references. """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += deep_sizeof(key, seen) + deep_sizeof(value, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += deep_sizeof(item, seen)
+    elif hasattr(obj, "__slots__") and not isinstance(obj, (str, array)):
+        for name in type(obj).__slots__:
+            size += deep_sizeof(getattr(obj, name), seen)
+    return size
@@ -5,8 +5,66 @@
 
 # pylint: disable=missing-function-docstring
 
+import io
 import os
-from .poly import CRC32
+import time
+from array import array
+from .pcolumns import AccountColumns, CRCBuckets, PassRefView, RawValueView, deep_sizeof
+from .pmireader import MiKeyView, MiMap
+from .poly import CRC32, CRCCache, file_crc32
+from .pprofile import Profiler
+from .pquery import AIndex, CRCIndex, crc_stamp
+from .psnapshot import Snapshot
+
+HEX_CRC_CACHE = CRCCache()
+
+MI_TABLES = ("accs", "users", "info", "pmap", "rank")
+
+# Reverse CRC32 index (crc32.n;p_ref), see CRCIndex
+PCRC_NAME = "pcrc"
+
+# Tree branch -> mi-file it is built from
+BRANCH_TABLE = {
+    "a": "accs",
+    "b": "users",
+    "c": "pmap",
+    "d": "accs",
+    "e": "accs",
+    "f": "accs",
+    "g": "rank",
+    "i": "info",
+    "j": "accs",
+}
+
+# Tree branch filled row by row, while reading each mi-file
+ROW_BRANCH = {
+    "accs": "a",
+    "users": "b",
+    "pmap": "c",
+    "rank": "g",
+    "info": "i",
+}
+
+CRC_BRANCHES = "defj"
+
+# Rank number (tree 'g') of rank.mi rows not ranked 0..9, see validate()
+BAD_RANK = -1
+
+# mi-files which can be memory-mapped (rows decoded on demand)
+MAPPABLE = ("info",)
+
+# Consistency checks, in order, and the mi-files each depends on
+CHECK_TABLES = {
+    "_check_1": ("accs", "users", "pmap"),
+    "_check_2": ("accs", "users"),
+    "_check_3": ("accs", "rank", "info"),
+}
+
+# up_key() tables: ASCII lower to upper, and delete blank/ control chars
+_UP_BYTES = bytes(
+    achr - 32 if ord("a") <= achr <= ord("z") else achr for achr in range(256)
+)
+_BLANK_BYTES = bytes(range(ord(" ") + 1))
 
 
 def main_test():
@@ -21,12 +79,42 @@ class ADatabase:
     """ Any Database with potential 'key_abs_path' configuration file. """
     my_encoding = "ascii"
 
-    def __init__(self, basedir="", config="", check=True, name="ADB"):
+    def __init__(
+            self, basedir="", config="", check=True, name="ADB",
+            lazy=False, compact=False, snapshot=False, mapped=(),
+            profile=None,
+    ):
+        """ Loads all mi-files, unless 'lazy' is set:
+        in that case each table is only read on first access,
+        and checks are only done when full_check() is called.
+        With 'compact', accounts are kept in columns (see pcolumns.py),
+        tree branches 'a' and 'd' become read-only views.
+        With 'snapshot' (True, or a directory) parsed tables and tree are
+        cached on disk, see psnapshot.py; not used with lazy or compact.
+        'mapped' lists mi-files (see MAPPABLE) to be memory-mapped instead
+        of read: rows are decoded when looked up, see pmireader.py
+        'profile' (True, "time", or a JSON lines path) records each phase,
+        see profile(); by default the PCHECKERS_PROFILE environment
+        variable is used, see pprofile.py
+        """
         self.name = name
         self.msg = ""
         self._basedir = ""
         self._cont, self._keybase = {}, {}
-        self._tree = {}
+        self._lazy = lazy
+        self._compact = compact
+        self._mapped = tuple(mapped)
+        assert set(self._mapped).issubset(MAPPABLE), f"Cannot map: {mapped}"
+        self._tree = LazyTree(self) if lazy else new_tree()
+        self._sums = {}
+        self._timings = {}
+        self.snapshot_msg = ""
+        self._snap = None
+        self._checks = {}
+        self._crcs = None
+        self._index = None
+        self._crc_index = None
+        self.profiler = Profiler(profile, name)
         self._init_config(
             basedir, config,
             os.path.join(
@@ -34,44 +122,175 @@ class ADatabase:
                 ".config", "pcheckers", "config",
             )
         )
-        self.load(
-            ["accs", "users", "info", "pmap", "rank"],
-        )
+        if lazy:
+            return
+        if snapshot and not (compact or mapped) and self._basedir:
+            self._snap = Snapshot(self._basedir, "" if snapshot is True else snapshot)
+            if self._load_snapshot(self._snap, check):
+                return
+        self.load(MI_TABLES)
         if check:
             self._do_all_checks()
+        if self._snap is not None:
+            self._save_snapshot(self._snap, check)
 
     def get_basedir(self):
         """ Returns the base mi-files directory. """
         return self._basedir
 
-    def get_tree(self):
-        """ Returns the tree dictionary. """
+    def is_lazy(self) -> bool:
+        return self._lazy
+
+    def get_tree(self, branches=""):
+        """ Returns the tree dictionary.
+        In lazy mode, only 'branches' (e.g. "ab") are built now;
+        other branches are built when first indexed.
+        """
+        if self._lazy:
+            for branch in branches:
+                self._tree[branch]	# pylint: disable=pointless-statement
         return self._tree
 
+    def timings(self) -> dict:
+        """ Returns seconds spent per phase: read, parse, crc, check, snapshot.
+        Always kept (wall clock only); see profile() for details per mi-file.
+        """
+        return dict(self._timings)
+
+    def profile(self) -> dict:
+        """ Returns per-phase profiling results (empty if not profiling):
+        config, read.<mif>, parse.<mif>, tree, tree.patch, _check_<N>,
+        snapshot.load and snapshot.save.
+        """
+        return self.profiler.results()
+
     def container(self, mif=None):
         if mif is None:
+            self._need(MI_TABLES)
             return self._cont
+        self._need((mif,))
         return self._cont[mif]
 
     def listed(self, mif=""):
         """ Return the list """
         if mif:
+            self._need((mif,))
             return list(self._cont[mif][1])
+        self._need(MI_TABLES)
         res = []
         for tbl in sorted(self._cont):
             res.append(self.listed(tbl))
         return res
 
     def keys(self, mif=None):
+        self._need(MI_TABLES if mif is None else (mif,))
         return self._keybase if mif is None else self._keybase[mif]["key"]
 
     def upkeys(self, mif=None):
+        self._need(MI_TABLES if mif is None else (mif,))
+        for name in (self._mapped if mif is None else (mif,)):
+            self._mapped_upkeys(name)
         return self._keybase if mif is None else self._keybase[mif]["up-key"]
 
+    def checksum(self, mif=None) -> tuple:
+        """ Returns (size, crc) of mi-file as loaded,
+        or of all loaded mi-files concatenated (sorted by name) if mif is None.
+        """
+        if mif is not None:
+            size, _, crc = self._mapped_sum(mif)
+            return size, crc
+        total, acc = 0, 0
+        for name in sorted(self._sums):
+            size, _, crc = self._mapped_sum(name)
+            acc = CRC32.combine(acc, crc, size)
+            total += size
+        return total, acc
+
+    def is_changed(self, mif) -> bool:
+        """ Returns True if mi-file changed on disk since it was loaded.
+        Size and mtime are checked first; the CRC only when they match.
+        """
+        size, mtime, crc = self._sums[mif]
+        path = self._mi_path(mif)
+        try:
+            stt = os.stat(path)
+        except FileNotFoundError:
+            return True
+        if (stt.st_size, stt.st_mtime_ns) != (size, mtime):
+            return True
+        if crc is None:
+            return False	# mapped, never fully read
+        return file_crc32(path) != (size, crc)
+
     def load(self, mi_list):
+        """ (Re-)loads mi-files, filling keys, up-keys, rows and tree. """
+        self._index = None
+        if set(mi_list).intersection(("accs", "pmap")):
+            self._crc_index = None
         for mif in mi_list:
+            old = self._tree.get("a") if mif == "accs" and self._crcs is not None else None
             head, tail = self._load_one(mif)
             self._cont[mif] = (head, tail)
+            if mif != "accs":
+                continue
+            if isinstance(old, dict) and not self._compact and "d" in self._tree:
+                self._patch_crc(old)
+                continue
+            for branch in CRC_BRANCHES:
+                self._tree.pop(branch, None)
+            self._crcs = None
+            if not self._lazy:
+                self._build_crc(self._tree)
+        return sorted(self._cont)
+
+    def indexes(self):
+        """ Returns the secondary indexes (built on first use), see pquery.py """
+        if self._index is None:
+            self._index = AIndex(self)
+        return self._index
+
+    def query(self, user=None, p_ref=None, rank=None, crc_prefix=None):
+        """ Yields account keys matching all given filters, e.g.
+        query(user="hm", rank=range(1, 5)).
+        """
+        return self.indexes().select(user, p_ref, rank, crc_prefix)
+
+    def crc_index(self):
+        """ Returns the reverse CRC32 index (see pquery.CRCIndex),
+        read from pcrc.mi if it matches the accs/ pmap checksums,
+        otherwise rebuilt from the CRC buckets (tree 'e').
+        """
+        if self._crc_index is not None:
+            return self._crc_index
+        self._need(("accs", "pmap"))
+        stamp = crc_stamp({mif: self.checksum(mif) for mif in ("accs", "pmap")})
+        idx = CRCIndex.load(self._mi_path(PCRC_NAME), stamp, ADatabase.my_encoding)
+        if idx is None:
+            idx = CRCIndex.from_buckets(self._tree["e"], stamp)
+        self._crc_index = idx
+        return idx
+
+    def by_crc(self, h_crc) -> list:
+        """ Returns the pass references whose CRC32 is 'h_crc'. """
+        return self.crc_index().lookup(h_crc)
+
+    def footprint(self) -> dict:
+        """ Returns bytes held by accounts: keys, tree branches 'a' and 'd'. """
+        seen = set()
+        n_accs = len(self._tree["a"])
+        total = sum(
+            deep_sizeof(obj, seen) for obj in (
+                self._keybase["accs"], self._tree["a"], self._tree["d"],
+            )
+        )
+        return {
+            "accounts": n_accs,
+            "bytes": total,
+            "per-account": total / n_accs if n_accs else 0.0,
+        }
+
+    def loaded(self) -> list:
+        """ Returns the mi-files already read. """
         return sorted(self._cont)
 
     def crc_clashes(self):
@@ -81,34 +300,229 @@ class ADatabase:
         ]
         return sum(lst)
 
+    def clash_report(self) -> list:
+        """ Returns [(crc, [p_ref, ...]), ...] for CRC32 values shared by pass references. """
+        return self.crc_buckets().report()
+
+    def crc_buckets(self):
+        """ Returns the CRC buckets (tree 'e', 'f' and 'j'). """
+        if self._crcs is None:
+            # only after a snapshot load: the tree came without its buckets
+            self._crcs = CRCBuckets()
+            self._crc_accounts(self._crcs, self._tree["a"])
+            self._tree["e"], self._tree["f"] = self._crcs.buckets, self._crcs.flat
+            self._tree["j"] = self._crcs.sizes
+        return self._crcs
+
     def full_check(self):
         """ Does the complete consistency check,
         returns empty string if all ok!
         """
-        msg = self._check_1()
-        if msg:
-            return msg
-        msg = self._check_2()
-        if msg:
-            return msg
-        msg = self._check_3()
-        return msg
+        self._checks = {}
+        self._index = None
+        for name in CHECK_TABLES:
+            msg = self._run_check(name)
+            self._checks[name] = msg
+            if msg:
+                return msg
+        return ""
+
+    def validate(self, max_errors=0) -> list:
+        """ Returns all violations, as (kind, key, detail) tuples,
+        with one pass per table; 'max_errors' > 0 stops after that many.
+        Kinds are: missing-user, dangling-pass-ref, orphan-user,
+        bad-rank (unknown account, or rank not 0..9) and bad-info.
+        """
+        res = []
+        accs, users, pmap = self._tree["a"], self._tree["b"], self._tree["c"]
+
+        def add(kind, key, detail) -> bool:
+            res.append((kind, key, detail))
+            return 0 < max_errors <= len(res)
+
+        used = set()
+        for key, (user, p_ref) in accs.items():
+            if user in users:
+                used.add(user)
+            elif add("missing-user", key, user):
+                return res
+            if p_ref not in pmap and add("dangling-pass-ref", key, p_ref):
+                return res
+        for user in sorted(set(users).difference(used)):
+            if add("orphan-user", user, ""):
+                return res
+        for key, (aval, _) in self._tree["g"].items():
+            if key not in accs:
+                if add("bad-rank", key, str(aval)):
+                    return res
+            elif aval == BAD_RANK:
+                if add("bad-rank", key, f"invalid rank: {self._raw_rank(key)}"):
+                    return res
+        for key in self._tree["i"]:
+            if key not in accs and add("bad-info", key, ""):
+                return res
+        return res
+
+    def refresh(self, check=True) -> list:
+        """ Re-reads only the mi-files changed on disk, patching their
+        tree branches, and re-runs the checks that depend on them.
+        Returns the list of re-read mi-files.
+        """
+        changed = [mif for mif in self.loaded() if self.is_changed(mif)]
+        if not changed:
+            return []
+        self.load(changed)
+        if check and not self._lazy:
+            start = time.perf_counter()
+            self.msg = self._recheck(changed)
+            self._tick("check", start)
+        if self._snap is not None:
+            self._save_snapshot(self._snap, check and not self._lazy)
+        return changed
 
     def _load_one(self, mif):
-        """ Load one mi-file. """
+        """ Load one mi-file, in a single pass. """
         assert len(mif) >= 4, mif
-        path = os.path.join(self._basedir, mif) + ".mi"
-        with open(path, "r", encoding=ADatabase.my_encoding) as fdin:
-            lst = fdin.readlines()
+        path = self._mi_path(mif)
+        start = time.perf_counter()
+        if mif in self._mapped:
+            return self._load_mapped(mif, path, start)
+        with self.profiler.phase(f"read.{mif}") as rec:
+            with open(path, "rb") as fdin:
+                data = self._read_summed(mif, fdin)
+            lst = io.StringIO(data.decode(ADatabase.my_encoding), newline=None).readlines()
+            rec["rows"] = len(lst) - 1
+        start = self._tick("read", start)
         self._keybase[mif] = {
             "key": {},
             "up-key": {},
         }
-        head, tail = lst[0].rstrip(), self._strict_list(lst[1:], mif)
-        return head,tail
+        if self._compact and mif == "accs":
+            branch = AccountColumns()
+            put = branch.add
+        else:
+            branch = {}
+            put = branch.__setitem__
+        self._tree[ROW_BRANCH[mif]] = branch
+        with self.profiler.phase(f"parse.{mif}") as rec:
+            head, tail = lst[0].rstrip(), self._strict_list(lst[1:], mif, put)
+            rec["rows"] = len(tail)
+        if isinstance(branch, AccountColumns):
+            self._keybase[mif]["key"] = RawValueView(branch)
+        self._tick("parse", start)
+        return head, tail
+
+    def _load_mapped(self, mif, path, start):
+        """ Maps the mi-file: only row offsets and keys are indexed now;
+        up-keys are checked on first use, see _mapped_upkeys().
+        """
+        old = self._cont.get(mif)
+        if old is not None:
+            old[1].close()
+        with self.profiler.phase(f"read.{mif}") as rec:
+            mimap = MiMap(path, ADatabase.my_encoding)
+            rec["rows"] = len(mimap)
+        self._sums[mif] = (mimap.size, mimap.mtime_ns, None)
+        view = MiKeyView(mimap)
+        self._keybase[mif] = {
+            "key": view,
+            "up-key": None,	# see _mapped_upkeys()
+        }
+        self._tree[ROW_BRANCH[mif]] = view
+        self._tick("read", start)
+        return mimap.header, mimap
+
+    def _mapped_upkeys(self, mif):
+        keyb = self._keybase[mif]
+        if keyb["up-key"] is not None:
+            return keyb["up-key"]
+        upkeys = {}
+        for idx, astr in enumerate(self._cont[mif][1], 2):
+            key, rvalue = astr.split(";", maxsplit=1)
+            upkey = up_key(key)
+            assert upkey not in upkeys, f"Already there, up-key ({mif}): {idx}: {upkey}"
+            upkeys[upkey] = rvalue
+        keyb["up-key"] = upkeys
+        return upkeys
+
+    def _mapped_sum(self, mif) -> tuple:
+        size, mtime, crc = self._sums[mif]
+        if crc is None:
+            crc = self._cont[mif][1].crc32()
+            self._sums[mif] = (size, mtime, crc)
+        return size, mtime, crc
+
+    def _load_snapshot(self, snap, check) -> bool:
+        start = time.perf_counter()
+        with self.profiler.phase("snapshot.load"):
+            state = snap.load()
+        self.snapshot_msg = snap.msg
+        if state is None:
+            return False
+        if check and not state["checked"]:
+            self.snapshot_msg = "Not checked"
+            return False
+        self._cont, self._keybase = state["cont"], state["keybase"]
+        self._tree, self._sums = state["tree"], state["sums"]
+        self.msg = state["msg"]
+        self._checks = state.get("checks", {})
+        self._tick("snapshot", start)
+        return True
+
+    def _save_snapshot(self, snap, checked) -> bool:
+        state = {
+            "basedir": self._basedir,
+            "sums": self._sums,
+            "cont": self._cont,
+            "keybase": self._keybase,
+            "tree": self._tree,
+            "msg": self.msg,
+            "checks": self._checks,
+            "checked": checked,
+        }
+        with self.profiler.phase("snapshot.save"):
+            is_ok = snap.save(state)
+        self.snapshot_msg = snap.msg
+        if not is_ok:
+            self._snap = None	# carry on without snapshot
+        return is_ok
+
+    def _need(self, mi_list):
+        """ Loads the tables in 'mi_list' not yet read (lazy mode). """
+        if not self._lazy:
+            return
+        for mif in mi_list:
+            if mif not in self._cont:
+                self.load((mif,))
 
-    def _strict_list(self, lst, mif, stt_idx=2):
+    def _tick(self, phase, start):
+        now = time.perf_counter()
+        self._timings[phase] = self._timings.get(phase, 0.0) + now - start
+        return now
+
+    def _mi_path(self, mif) -> str:
+        return os.path.join(self._basedir, mif) + ".mi"
+
+    def _read_summed(self, mif, fdin, chunk_size=65536) -> bytes:
+        """ Reads the whole file, computing its checksum on the way. """
+        acrc = CRC32()
+        chunks = []
+        while True:
+            chunk = fdin.read(chunk_size)
+            if not chunk:
+                break
+            acrc.update(memoryview(chunk))
+            chunks.append(chunk)
+        data = b"".join(chunks)
+        self._sums[mif] = (len(data), os.fstat(fdin.fileno()).st_mtime_ns, acrc.digest())
+        return data
+
+    def _strict_list(self, lst, mif, put, stt_idx=2) -> list:
+        """ Returns the rows, and fills key, up-key and tree branch (using 'put'). """
         assert mif, self.name
+        keys, upkeys = self._keybase[mif]["key"], self._keybase[mif]["up-key"]
+        to_branch = _BRANCH_VALUE[mif]
+        rows = []
         for idx, line in enumerate(lst, stt_idx):
             assert line.endswith("\n"), f"Bad line ({mif}): {idx}"
             astr = line[:-1]
@@ -116,25 +530,43 @@ class ADatabase:
             keypair = astr.split(";", maxsplit=1)
             key, rvalue = keypair
             assert key, self.name
-            upkey = ''.join([achr.upper() for achr in key if achr > ' '])
-            assert key not in self._keybase[mif]["key"], f"Already there ({mif}): {idx}: {key}"
-            self._keybase[mif]["key"][key] = rvalue
+            upkey = up_key(key)
+            assert key not in keys, f"Already there ({mif}): {idx}: {key}"
+            keys[key] = rvalue
             msg = f"Already there, up-key ({mif}): {idx}: {upkey}"
-            assert upkey not in self._keybase[mif]["up-key"], msg
-            self._keybase[mif]["up-key"][upkey] = rvalue
-            yield astr
+            assert upkey not in upkeys, msg
+            upkeys[upkey] = rvalue
+            put(key, to_branch(key, rvalue))
+            rows.append(astr)
+        return rows
 
     def _do_all_checks(self):
+        start = time.perf_counter()
         self.msg = self.full_check()
+        self._tick("check", start)
         return self.msg
 
+    def _recheck(self, changed) -> str:
+        """ Re-runs the checks depending on 'changed' (or not run yet). """
+        for name, tables in CHECK_TABLES.items():
+            if name not in self._checks or set(tables).intersection(changed):
+                self._checks[name] = self._run_check(name)
+        for msg in self._checks.values():
+            if msg:
+                return msg
+        return ""
+
+    def _run_check(self, name) -> str:
+        with self.profiler.phase(name) as rec:
+            msg = getattr(self, name)()
+            rec["rows"] = len(self._tree["a"])
+        return msg
+
     def _check_1(self):
         """ First level checking:
 		1. An account username is known.
 		2. An account password exists.
         """
-        if not self._tree:
-            self._tree = self._build_tree(self._keybase)
         users = self._tree["b"]
         for key, item in self._tree["a"].items():
             user_ref = users.get(item[0])
@@ -172,89 +604,206 @@ class ADatabase:
         """ Check ranks match any of accounts.
         Also check users at info.mi exist!
         """
-        for key in self._tree["g"]:
+        for key, (aval, _) in self._tree["g"].items():
             wot = self._tree["a"].get(key)
             if wot is None:
                 return f"Rank with invalid account id: {[key]}"
+            if aval == BAD_RANK:
+                return f"Invalid rank number for {[key]}: {self._raw_rank(key)}"
         for key in self._tree["i"]:
             if key not in self._tree["a"]:
                 return f"Info with invalid account id: {[key]}"
         return ""
 
+    def _raw_rank(self, key) -> str:
+        """ Returns the rank as written at rank.mi (tree 'g' must be built). """
+        return self._keybase["rank"]["key"][key].split(";", maxsplit=1)[0]
+
     def _init_config(self, basedir, config, def_config):
         if config:
             cfg_path = config
         else:
             cfg_path = def_config
-        cfg = load_simple_config(
-            basedir if basedir else cfg_path
-        )
+        with self.profiler.phase("config"):
+            cfg = load_simple_config(
+                basedir if basedir else cfg_path
+            )
         key_abs_path = os.path.realpath(cfg["key_abs_path"])
         is_ok = os.path.isdir(key_abs_path)
         self._basedir = key_abs_path if is_ok else ""
         return is_ok
 
-    def _build_tree(self, dct):
-        """ Get entire database tree.
-        """
-        tree = {
-            "a": {},	# Accounts
-            "b": {},	# B-users
-            "c": {},	# Convert passwords
-            "d": {},	# D-used pass reference by user
-            "e": {},	# CRC32 'F0491F19': ['7119']
-            "f": {},	# same as 'e' but with CRC32.1 if there is only one
-            "g": {},	# Ranks
-            "i": {},	# Info
-            "j": {
-                1:0, 2:0, 3:0,	# Only up to 3 clashes in CRC32 allowed
-            }
-        }
+    def _build_crc(self, tree):
+        """ Branches d, e, f and j, from accounts (branch a). """
+        start = time.perf_counter()
+        accs = self._tree["a"]
+        crcs = CRCBuckets()
+        with self.profiler.phase("tree") as rec:
+            if isinstance(accs, AccountColumns):
+                self._build_crc_columns(tree, accs, crcs)
+            else:
+                self._build_crc_dicts(tree, accs, crcs)
+            rec["rows"] = len(accs)
+        tree["e"], tree["f"], tree["j"] = crcs.buckets, crcs.flat, crcs.sizes
+        self._crcs = crcs
+        self._tick("crc", start)
+        return tree
+
+    def _build_crc_dicts(self, tree, accs, crcs):
         pwds = {}
-        accs, users = dct["accs"], dct["users"]
-        assert not accs["key"], "Unexpected iterator (yield)"
-        self.listed()
-        for key, item in accs["key"].items():
-            user, p_ref = item.split(";", maxsplit=1)
-            tree["a"][key] = (user, p_ref)
-            h_crc = hex_crc(p_ref)
+        for key, user, p_ref, h_crc in self._crc_accounts(crcs, accs):
             stg = (key, user, h_crc)
             if p_ref in pwds:
                 pwds[p_ref].append(stg)
             else:
                 pwds[p_ref] = [stg]
-            if h_crc in tree["e"]:
-                tree["e"][h_crc] = list(set(tree["e"][h_crc] + [p_ref]))
-            else:
-                tree["e"][h_crc] = [p_ref]
-        for key, item in users["key"].items():
-            assert item, f"Missing user referenced as: {[key]}"
-            tree["b"][key] = item
-        for key, item in dct["pmap"]["key"].items():
-            assert key not in tree["c"], f"Duplicate pmap: {key}"
-            tree["c"][key] = item
         tree["d"] = pwds
-        for key, item in tree["e"].items():
-            n_clash = len(item)
-            tree["j"][n_clash] += 1
-            tree["f"][f"{key}.{n_clash}"] = tuple(item)
-        for key, item in dct["rank"]["key"].items():
-            tup = item.split(";", maxsplit=1)
-            aval, opt_extra = tup
-            assert 0 <= int(aval) <= 9, f"Invalid rank number for {[key]}: {aval}"
-            tree["g"][key] = (int(aval), opt_extra)
-        for key, item in dct["info"]["key"].items():
-            tree["i"][key] = item
-        return tree
+
+    def _build_crc_columns(self, tree, accs, crcs):
+        """ One CRC per (interned) pass reference, inserted once per account. """
+        strs = accs.prefs.strs
+        hexes = hex_crc_many(strs)
+        for pid in accs.pref_col:
+            crcs.insert(hexes[pid], strs[pid])
+        tree["d"] = PassRefView(accs, array("I", [int(h_crc, 16) for h_crc in hexes]))
+
+    def _patch_crc(self, old):
+        """ Re-loaded accounts: only changed ones leave/ enter
+        tree 'd' and the CRC buckets (tree 'e', 'f', 'j' are kept, updated).
+        """
+        start = time.perf_counter()
+        accs, pwds, crcs = self._tree["a"], self._tree["d"], self._crcs
+        with self.profiler.phase("tree.patch") as rec:
+            gone = [(key, val) for key, val in old.items() if accs.get(key) != val]
+            new = [(key, val) for key, val in accs.items() if old.get(key) != val]
+            for key, (user, p_ref) in gone:
+                seq = pwds[p_ref]
+                h_crc = seq[0][2]
+                seq.remove((key, user, h_crc))
+                if not seq:
+                    del pwds[p_ref]
+                crcs.remove(h_crc, p_ref)
+            hexes = hex_crc_many([p_ref for _, (_, p_ref) in new])
+            for (key, (user, p_ref)), h_crc in zip(new, hexes):
+                crcs.insert(h_crc, p_ref)
+                stg = (key, user, h_crc)
+                if p_ref in pwds:
+                    pwds[p_ref].append(stg)
+                else:
+                    pwds[p_ref] = [stg]
+            rec["rows"] = len(gone) + len(new)
+        self._tick("crc", start)
+
+    def _crc_accounts(self, crcs, accs) -> list:
+        """ Inserts all accounts into 'crcs', returns (key, user, p_ref, crc) per account. """
+        res = []
+        pairs = list(accs.items())
+        hexes = hex_crc_many([pair[1] for _, pair in pairs])
+        for (key, (user, p_ref)), h_crc in zip(pairs, hexes):
+            crcs.insert(h_crc, p_ref)
+            res.append((key, user, p_ref, h_crc))
+        return res
+
+
+class LazyTree(dict):
+    """ ADatabase tree, where branches are built on first access. """
+    def __init__(self, adb):
+        super().__init__()
+        self._adb = adb
+
+    def __missing__(self, branch):
+        mif = BRANCH_TABLE.get(branch)
+        if mif is None:
+            raise KeyError(branch)
+        adb = self._adb
+        # pylint: disable=protected-access
+        adb._need((mif,))
+        if branch in CRC_BRANCHES:
+            adb._build_crc(self)
+        return self[branch]
+
+
+def new_tree() -> dict:
+    """ Returns an empty tree. """
+    return {
+        "a": {},	# Accounts
+        "b": {},	# B-users
+        "c": {},	# Convert passwords
+        "d": {},	# D-used pass reference by user
+        "e": {},	# CRC32 'F0491F19': {'7119'}
+        "f": {},	# same as 'e' but with CRC32.1 if there is only one
+        "g": {},	# Ranks
+        "i": {},	# Info
+        "j": {
+            1:0, 2:0, 3:0,	# Only up to 3 clashes in CRC32 allowed
+        }
+    }
+
+
+def violation_str(viol) -> str:
+    """ Returns a readable line for a (kind, key, detail) violation. """
+    kind, key, detail = viol
+    return f"{kind}: {[key]}" + (f" -> {detail}" if detail else "")
+
+
+def _accs_value(key, rvalue) -> tuple:
+    user, p_ref = rvalue.split(";", maxsplit=1)
+    return user, p_ref
+
+
+def _users_value(key, rvalue) -> str:
+    assert rvalue, f"Missing user referenced as: {[key]}"
+    return rvalue
+
+
+def _rank_value(key, rvalue) -> tuple:
+    """ Returns (rank, extra); rank is BAD_RANK unless 0..9. """
+    aval, opt_extra = rvalue.split(";", maxsplit=1)
+    try:
+        rnum = int(aval)
+    except ValueError:
+        return BAD_RANK, opt_extra
+    if not 0 <= rnum <= 9:
+        return BAD_RANK, opt_extra
+    return rnum, opt_extra
+
+
+def _same_value(key, rvalue) -> str:
+    return rvalue
+
+
+# Per mi-file: row value -> tree branch value
+_BRANCH_VALUE = {
+    "accs": _accs_value,
+    "users": _users_value,
+    "pmap": _same_value,
+    "rank": _rank_value,
+    "info": _same_value,
+}
 
 
 def hex_crc(astr: str):
     """ Returns CRC32 8-char (4 nibbles) string """
     assert isinstance(astr, str), "hex()"
-    hstr = CRC32.compute_hex(astr)
+    hstr = HEX_CRC_CACHE.get(astr)
     return hstr
 
 
+def hex_crc_many(strs) -> list:
+    """ Returns the list of CRC32 strings, one per string in 'strs'. """
+    return HEX_CRC_CACHE.get_many(strs)
+
+
+def up_key(key: str) -> str:
+    """ Returns the normalized key: upper-case, without blanks or control chars.
+    Same as ''.join([achr.upper() for achr in key if achr > ' ']),
+    using bytes translate tables for ASCII keys.
+    """
+    if key.isascii():
+        return key.encode("ascii").translate(_UP_BYTES, _BLANK_BYTES).decode("ascii")
+    return ''.join([achr.upper() for achr in key if achr > ' '])
+
+
 def load_simple_config(path, enc_in="ascii"):
     cfg = {}
     with open(path, "r", encoding=enc_in) as fdin:
@@ -0,0 +1,202 @@
+#!/usr/bin/python3
+# pgenerate.py  (c)2026  Henrique Moreira
+
+""" Synthetic mi-files database generator, for scale tests
+"""
+
+# pylint: disable=missing-function-docstring
+
+import os
+import random
+import sys
+import zlib
+
+DEF_PARAMS = {
+    "accounts": 1000,
+    "users": 0,		# 0: about accounts / 50
+    "prefs": 0,		# 0: about accounts / 2
+    "clash_rate": 0.0,	# fraction of pass references in a CRC32 clash pair
+    "orphans": 0,	# users not referenced by any account
+    "rank_rate": 0.5,	# fraction of accounts listed at rank.mi
+    "rank_weights": (1, 2, 3, 3, 2, 1, 1, 1, 1, 1),	# ranks 0..9
+    "info_rate": 0.3,	# fraction of accounts listed at info.mi
+    "seed": 1,
+}
+
+HEADERS = {
+    "accs": "#acc_title;user_key;pass_hint",
+    "info": "#acc_title*(str);at_pwsafe(bool);info_str",
+    "pmap": "#pass_hint;pass_value",
+    "rank": "#acc_title;rank;desc",
+    "users": "#user;user_name",
+}
+
+# CRC forging: suffix chars '@', 'A'..'O' (0x40..0x4F), 4 free bits each
+_FORGE_CHARS = 10
+_FORGE_BASE = 0x40
+
+
+def main():
+    """ Main script """
+    code = run_main(sys.argv[1:])
+    if code is None:
+        print(f"""Usage:
+
+python {__file__} [options] DIR
+
+Options are:
+  -n NUM            Number of accounts (default: {DEF_PARAMS["accounts"]})
+  -u NUM            Number of users
+  -p NUM            Number of pass references
+  -c RATE           CRC32 clash rate, e.g. 0.01
+  -o NUM            Orphan users
+  -r RATE           Rank rate (accounts at rank.mi)
+  -s NUM            Random seed
+""")
+    sys.exit(code if code else 0)
+
+
+def run_main(args):
+    opts = {
+        "-n": ("accounts", int),
+        "-u": ("users", int),
+        "-p": ("prefs", int),
+        "-c": ("clash_rate", float),
+        "-o": ("orphans", int),
+        "-r": ("rank_rate", float),
+        "-s": ("seed", int),
+    }
+    params = {}
+    param = args
+    while param and param[0].startswith("-"):
+        if param[0] not in opts or len(param) < 2:
+            return None
+        name, conv = opts[param[0]]
+        params[name] = conv(param[1])
+        del param[:2]
+    if len(param) != 1:
+        return None
+    counts = generate(param[0], **params)
+    print("Generated:", param[0], counts)
+    return 0
+
+
+def generate(path, **kwargs) -> dict:
+    """ Writes valid accs/ users/ pmap/ rank/ info mi-files at 'path',
+    and a 'config' file (key_abs_path=...) usable by ADatabase.
+    Returns the number of rows per mi-file.
+    """
+    params = dict(DEF_PARAMS)
+    for key, value in kwargs.items():
+        assert key in DEF_PARAMS, f"Unknown parameter: {key}"
+        params[key] = value
+    n_accs = params["accounts"]
+    n_users = params["users"] or max(1, n_accs // 50)
+    n_prefs = params["prefs"] or max(1, n_accs // 2)
+    assert n_accs > 0 and n_users <= n_accs and n_prefs <= n_accs, params
+    rnd = random.Random(params["seed"])
+    os.makedirs(path, exist_ok=True)
+    prefs = PassRefs(n_prefs, params["clash_rate"])
+    counts = {}
+    counts["users"] = _write(path, "users", (
+        f"u{idx};user{idx}@example.com" for idx in range(n_users + params["orphans"])
+    ))
+    counts["pmap"] = _write(path, "pmap", (
+        f"{prefs.name(idx)};pw-{idx:08x}-{rnd.getrandbits(32):08x}" for idx in range(n_prefs)
+    ))
+    counts["accs"] = _write(path, "accs", (
+        f"{_title(idx)};u{idx if idx < n_users else rnd.randrange(n_users)};"
+        f"{prefs.name(idx if idx < n_prefs else rnd.randrange(n_prefs))}"
+        for idx in range(n_accs)
+    ))
+    ranks = list(range(10))
+    counts["rank"] = _write(path, "rank", (
+        f"{_title(idx)};{rnd.choices(ranks, params['rank_weights'])[0]};"
+        for idx in range(n_accs) if rnd.random() < params["rank_rate"]
+    ))
+    counts["info"] = _write(path, "info", (
+        f"{_title(idx)};{'T' if idx % 3 else 'F'};note {idx}"
+        for idx in range(n_accs) if rnd.random() < params["info_rate"]
+    ))
+    with open(os.path.join(path, "config"), "w", encoding="ascii") as fdout:
+        fdout.write(f"key_abs_path={os.path.realpath(path)}\n")
+    return counts
+
+
+class PassRefs:
+    """ Pass reference names; odd ones may be forged to clash with the previous one. """
+
+    def __init__(self, n_prefs, clash_rate):
+        n_pairs = int(n_prefs * clash_rate / 2)
+        self._forged = {}
+        if n_pairs:
+            step = max(2, (n_prefs // n_pairs) & ~1)
+            basis = _forge_basis()
+            for idx in range(1, min(n_prefs, step * n_pairs), step):
+                target = zlib.crc32(self.name(idx - 1).encode("ascii"))
+                self._forged[idx] = forge_crc(f"c{idx:x}", target, basis)
+
+    def name(self, idx) -> str:
+        there = self._forged.get(idx)
+        return f"p{idx:x}" if there is None else there
+
+    def clashes(self) -> int:
+        return len(self._forged)
+
+
+def forge_crc(prefix: str, target: int, basis=None) -> str:
+    """ Returns prefix + suffix, whose CRC32 is 'target'.
+    The suffix only uses chars '@', 'A'..'O'.
+    """
+    if basis is None:
+        basis = _forge_basis()
+    zero = bytes([_FORGE_BASE]) * _FORGE_CHARS
+    need = zlib.crc32(prefix.encode("ascii") + zero) ^ target
+    combo = 0
+    for pivot in sorted(basis, reverse=True):
+        if need >> pivot & 1:
+            vec, mask = basis[pivot]
+            need ^= vec
+            combo ^= mask
+    assert need == 0, "CRC32 forge: basis not full rank"
+    suffix = bytearray(zero)
+    for pos in range(_FORGE_CHARS):
+        suffix[pos] ^= (combo >> (4 * pos)) & 0x0F
+    return prefix + suffix.decode("ascii")
+
+
+def _forge_basis() -> dict:
+    """ GF(2) basis: pivot bit -> (CRC32 delta, suffix bits flipped). """
+    zero = bytes([_FORGE_BASE]) * _FORGE_CHARS
+    base = zlib.crc32(zero)
+    basis = {}
+    for pos in range(_FORGE_CHARS):
+        for bit in range(4):
+            data = bytearray(zero)
+            data[pos] ^= 1 << bit
+            vec, mask = zlib.crc32(bytes(data)) ^ base, 1 << (4 * pos + bit)
+            for pivot in sorted(basis, reverse=True):
+                if vec >> pivot & 1:
+                    vec ^= basis[pivot][0]
+                    mask ^= basis[pivot][1]
+            if vec:
+                basis[vec.bit_length() - 1] = (vec, mask)
+    return basis
+
+
+def _title(idx) -> str:
+    return f"Acc{idx:08d}.example"
+
+
+def _write(path, mif, rows) -> int:
+    count = 0
+    with open(os.path.join(path, mif) + ".mi", "w", encoding="ascii") as fdout:
+        fdout.write(HEADERS[mif] + "\n")
+        for row in rows:
+            fdout.write(row + "\n")
+            count += 1
+    return count
+
+
+if __name__ == "__main__":
+    main()
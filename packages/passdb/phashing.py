@@ -5,7 +5,10 @@
 
 # pylint: disable=missing-function-docstring
 
+import heapq
 import os
+import stat
+from .poly import CRC32, file_crc32
 
 
 class PHasher:
@@ -16,50 +19,78 @@ class PHasher:
         self._adb = adb
         self.a_keys, self.sort_keys = [], []
         self.imp = []
+        self.written = False
 
     def get_db(self):
         return self._adb
 
     def builder(self):
-        adb = self._adb
-        dct = adb.get_tree()["d"]
-        users = adb.get_tree()["b"]
-        imp = {}
-        assert adb.crc_clashes() == 0, "Don't know how to handle clashes at pass references."
-        for key, seq in dct.items():
-            lst = [
-                (trip[0], users[trip[1]]) for trip in seq
-                if interesting(adb, trip[0])
-            ]
-            if not lst:
-                continue
-            imp[key] = (
-                seq[0][2] + ".1",
-                lst,
-            )
+        imp = {key: (crc, lst) for key, crc, lst in self._entries()}
         sorted_keys = sorted(
             imp.keys(), key=lambda k: len(imp[k][1]),
             reverse=True,
         )
-        self.a_keys = sorted(adb.get_tree()["a"])
+        self.a_keys = sorted(self._adb.get_tree()["a"])
         self.sort_keys = sorted_keys
         self.imp = imp
         return imp
 
-    def dump_important(self, sep="\n\n"):
-        keys = self.sort_keys
-        for idx, key in enumerate(keys, 1):
+    def top(self, k) -> list:
+        """ Returns the 'k' most reused pass references, as (key, crc, seq),
+        in O(n log k): only 'k' entries are kept (builder() not needed).
+        """
+        assert k > 0, "top(k)"
+        if self.imp:
+            ents = ((key, *self.imp[key]) for key in self.imp)
+        else:
+            ents = self._entries()
+        return heapq.nlargest(k, ents, key=lambda ent: len(ent[2]))
+
+    def important(self, k=0):
+        """ Yields (key, crc, seq), most reused pass references first;
+        k > 0 yields the top 'k' only.
+        """
+        if k > 0:
+            yield from self.top(k)
+            return
+        for key in self.sort_keys:
             crc, seq = self.imp[key]
+            yield key, crc, seq
+
+    def dump_important(self, sep="\n\n", k=0):
+        total = k if k > 0 else len(self.sort_keys)
+        for idx, (key, crc, seq) in enumerate(self.important(k), 1):
             print(
-                f"idx{idx}/{len(keys)}:",
+                f"idx{idx}/{total}:",
                 crc,
                 len(seq),
                 key, seq,
                 end=sep,
             )
-        #print(adb.get_tree()["g"])
+
+    def _entries(self):
+        """ Yields (p_ref, hid, [(key, user), ...]) with interesting accounts only.
+        hid is the two-level hash id (see pquery.CRCIndex.hid_of), so CRC32 clashes are fine.
+        """
+        adb = self._adb
+        dct = adb.get_tree()["d"]
+        users = adb.get_tree()["b"]
+        hid_of = adb.crc_index().hid_of
+        skip = ranked_out(adb)
+        for key, seq in dct.items():
+            lst = [
+                (trip[0], users[trip[1]]) for trip in seq
+                if trip[0] not in skip
+            ]
+            if not lst:
+                continue
+            yield key, hid_of(key), lst
 
     def brute_save(self):
+        """ Writes pcrc.mi: the most reused pass references first, then all others,
+        stamped so that ADatabase.crc_index() can load it back.
+        The file is left untouched if the content is the same ('written' is False).
+        """
         bdir = self._adb.get_basedir()
         if not bdir or not self.sort_keys:
             return False
@@ -67,17 +98,53 @@ class PHasher:
             bdir,
             PHasher.pcrc_name,
         )
-        astr = "#crc32.1;p_ref\n"
-        for key in self.sort_keys:
-            crc, seq = self.imp[key]
-            line = f"{crc};{key}"
-            astr += line + "\n"
-        with open(fname, "w", encoding="ascii") as fdout:
-            fdout.write(astr)
+        idx = self._adb.crc_index()
+        self.written = write_if_changed(fname, lambda: idx.rows(self.sort_keys))
         return True
 
 
+def write_if_changed(path, gen_lines, encoding="ascii") -> bool:
+    """ Writes the lines yielded by gen_lines() atomically: temp file
+    in the same directory, fsync, rename.
+    Returns False, without writing, if 'path' already has that content.
+    """
+    acrc, size = CRC32(), 0
+    for line in gen_lines():
+        data = (line + "\n").encode(encoding)
+        acrc.update(data)
+        size += len(data)
+    try:
+        if file_crc32(path) == (size, acrc.digest()):
+            return False
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = None
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w", encoding=encoding, newline="\n") as fdout:
+            for line in gen_lines():
+                fdout.write(line + "\n")
+            fdout.flush()
+            os.fsync(fdout.fileno())
+        if mode is not None:
+            os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except OSError:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return True
+
+
 def interesting(adb, key, min_val=4):
     ranks = adb.get_tree()["g"]
     tup = ranks.get(key, (min_val, ''))
     return 0 < tup[0] <= min_val
+
+
+def ranked_out(adb, min_val=4) -> set:
+    """ Returns the accounts not interesting(): ranked 0, or above 'min_val'.
+    Computed once per ranks table, instead of one lookup per account.
+    """
+    ranks = adb.get_tree()["g"]
+    return {key for key, tup in ranks.items() if not 0 < tup[0] <= min_val}
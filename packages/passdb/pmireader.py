@@ -0,0 +1,120 @@
+# pmireader.py  (c)2026  Henrique Moreira
+
+""" Memory-mapped mi-files: rows are decoded on demand
+"""
+
+# pylint: disable=missing-function-docstring
+
+import mmap
+import os
+import zlib
+from array import array
+from collections.abc import Mapping, Sequence
+
+
+class MiMap(Sequence):
+    """ mi-file mapped in memory, with a line-offset index (data rows only)
+    and a key -> row index.
+    Rows are checked as ADatabase checks read mi-files: each ends with a
+    new-line, has a key, and keys are unique; up-keys are not checked here.
+    """
+
+    def __init__(self, path, encoding="ascii", splitter=";"):
+        self.path = path
+        self._encoding = encoding
+        self._split_str = splitter
+        self._splitter = splitter.encode(encoding)
+        with open(path, "rb") as fdin:
+            stt = os.fstat(fdin.fileno())
+            self.size, self.mtime_ns = stt.st_size, stt.st_mtime_ns
+            self._mm = mmap.mmap(fdin.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        self._offsets = array("Q")	# start of each data row; last one is the end
+        self._key_rows = {}	# key (bytes) -> data row index
+        self.header = self._index()
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[one] for one in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(idx)
+        return self._decode(self._offsets[idx], self._offsets[idx + 1])
+
+    def find_row(self, key: str) -> int:
+        """ Returns the data row index of 'key', or -1 if not found. """
+        return self._key_rows.get(key.encode(self._encoding), -1)
+
+    def get_value(self, key: str, default=None):
+        """ Returns what follows the first splitter, in the row of 'key'. """
+        idx = self.find_row(key)
+        if idx < 0:
+            return default
+        return self[idx].split(self._split_str, maxsplit=1)[1]
+
+    def row_key(self, idx) -> str:
+        start, end = self._offsets[idx], self._offsets[idx + 1]
+        pos = self._mm.find(self._splitter, start, end)
+        return self._mm[start:pos if pos >= 0 else end].decode(self._encoding)
+
+    def crc32(self) -> int:
+        """ Returns the CRC32 of the whole file (reads every page). """
+        return zlib.crc32(self._mm)
+
+    def close(self):
+        if self._mm:
+            self._mm.close()
+
+    def _index(self) -> str:
+        """ Builds the row offsets and keys, returns the header row. """
+        mmp, offsets, rows = self._mm, self._offsets, self._key_rows
+        name = os.path.basename(self.path)
+        end = len(mmp)
+        pos = mmp.find(b"\n")
+        head = mmp[:pos if pos >= 0 else end]
+        while 0 <= pos < end - 1:
+            start = pos + 1
+            pos = mmp.find(b"\n", start)
+            line = len(offsets) + 2
+            assert pos >= 0, f"Bad line ({name}): {line}"
+            cut = mmp.find(self._splitter, start, pos)
+            assert cut > start, f"Bad line ({name}): {line}"
+            key = mmp[start:cut]
+            assert key not in rows, f"Already there ({name}): {line}: {key.decode()}"
+            rows[key] = len(offsets)
+            offsets.append(start)
+        offsets.append(end)
+        return head.decode(self._encoding).rstrip("\r")
+
+    def _decode(self, start, end) -> str:
+        line = self._mm[start:end].decode(self._encoding)
+        if line.endswith("\n"):
+            line = line[:-1]
+        return line.rstrip("\r")
+
+
+class MiKeyView(Mapping):
+    """ Read-only key -> value (after the first ';') over a MiMap. """
+    __slots__ = ("_mimap",)
+
+    def __init__(self, mimap):
+        self._mimap = mimap
+
+    def __getitem__(self, key):
+        value = self._mimap.get_value(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self._mimap.find_row(key) >= 0
+
+    def __iter__(self):
+        mimap = self._mimap
+        return (mimap.row_key(idx) for idx in range(len(mimap)))
+
+    def __len__(self):
+        return len(self._mimap)
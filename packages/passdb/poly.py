@@ -1,25 +1,55 @@
 """ Polynomial CRCs """
 
-#import zlib
-
 # pylint: disable=missing-function-docstring
 
+from collections import OrderedDict
+
+try:
+    from zlib import crc32 as _native_crc32
+except ImportError:
+    try:
+        from binascii import crc32 as _native_crc32
+    except ImportError:
+        _native_crc32 = None
+
+from importlib.util import find_spec
+
+# NumPy is only imported by the vectorized path (see numpy_module())
+HAS_NUMPY = find_spec("numpy") is not None
+_NUMPY = []
+
+MASK32 = 0xFFFFFFFF
+
+# Reference vectors: (input, CRC-32 IEEE 802.3)
+_CHECK_VECTORS = (
+    ("", 0x00000000),
+    ("a", 0xE8B7BE43),
+    ("123456789", 0xCBF43926),
+    ("The quick brown fox jumps over the lazy dog", 0x414FA339),
+)
+
 
 class CRC32:
     """ CRC-32 (IEEE 802.3) """
     POLY = 0xEDB88320
+    SLICES = 8
+    use_native = True	# zlib/ binascii fast path, when available
+    _tables = {}
 
     def __init__(self):
-        self._crc = 0xFFFFFFFF
+        self._crc = MASK32
 
     def update(self, data: bytes):
-        for b in data:
-            self._crc ^= b
-            for _ in range(8):
-                self._crc = (self._crc >> 1) ^ (self.POLY if (self._crc & 1) else 0)
+        """ Updates with bytes, bytearray or memoryview chunks. """
+        if isinstance(data, memoryview) and data.format != "B":
+            data = data.cast("B")
+        if self._has_native():
+            self._crc = ~_native_crc32(data, ~self._crc & MASK32) & MASK32
+        else:
+            self._crc = self._update_sliced(self._crc, data)
 
     def digest(self) -> int:
-        return (~self._crc) & 0xFFFFFFFF
+        return (~self._crc) & MASK32
 
     def hexdigest(self) -> str:
         return f"{self.digest():08X}"
@@ -34,8 +64,287 @@ class CRC32:
     def compute_hex(cls, s: str) -> str:
         return f"{cls.compute(s):08X}"
 
+    @classmethod
+    def combine(cls, crc_a: int, crc_b: int, len_b: int) -> int:
+        """ Returns the CRC of A+B, given CRC of A, CRC of B and the length of B. """
+        return crc32_combine(crc_a, crc_b, len_b, cls.POLY)
+
+    @classmethod
+    def compute_many(cls, strs, vectorized=False) -> list:
+        """ Returns the list of CRC32 hex strings, one per input string.
+        vectorized=True uses NumPy (if available) across all strings at once.
+        """
+        if vectorized and HAS_NUMPY:
+            return [f"{value:08X}" for value in cls.compute_vector(strs).tolist()]
+        if cls._has_native():
+            return [
+                f"{_native_crc32(astr.encode('ascii')) & MASK32:08X}" for astr in strs
+            ]
+        return [
+            f"{~cls._update_sliced(MASK32, astr.encode('ascii')) & MASK32:08X}"
+            for astr in strs
+        ]
+
+    @classmethod
+    def compute_vector(cls, strs):
+        """ Returns a NumPy uint32 array of CRCs, one per string.
+        Keys are packed into a padded uint8 matrix, and the table-driven
+        CRC runs column by column over all rows at once.
+        """
+        numpy = numpy_module()
+        mtx, lengths = pack_keys(strs)
+        table = numpy.array(cls.tables()[0], dtype=numpy.uint32)
+        # Longest keys first: column 'col' only touches the first 'n_rows' rows
+        order = numpy.argsort(-lengths, kind="stable")
+        mtx, lengths = mtx[order], lengths[order]
+        asc = lengths[::-1]
+        active = len(lengths) - numpy.searchsorted(asc, numpy.arange(mtx.shape[1]), side="right")
+        crc = numpy.full(len(lengths), MASK32, dtype=numpy.uint32)
+        for col in range(mtx.shape[1]):
+            n_rows = int(active[col])
+            part = crc[:n_rows]
+            crc[:n_rows] = (part >> 8) ^ table[(part ^ mtx[:n_rows, col]) & 0xFF]
+        res = numpy.empty_like(crc)
+        res[order] = ~crc
+        return res
+
+    @classmethod
+    def tables(cls) -> tuple:
+        """ Returns the slicing tables (one per slice) for this polynomial. """
+        return _tables_for(cls.POLY)
+
+    @classmethod
+    def self_check(cls) -> str:
+        """ Checks the bitwise, table-driven and native paths agree.
+        Returns an empty string if all ok!
+        """
+        samples = [astr for astr, _ in _CHECK_VECTORS] + ["redundant", "cyjefpl"]
+        for astr in samples:
+            data = astr.encode("ascii")
+            slow = ~cls._update_bitwise(MASK32, data) & MASK32
+            fast = ~cls._update_sliced(MASK32, data) & MASK32
+            if slow != fast:
+                return f"Table mismatch for {[astr]}: {fast:08X} vs {slow:08X}"
+            if cls.POLY == CRC32.POLY and _native_crc32 is not None:
+                if _native_crc32(data) & MASK32 != slow:
+                    return f"Native mismatch for {[astr]}"
+        if cls.POLY != CRC32.POLY:
+            return ""
+        for astr, expected in _CHECK_VECTORS:
+            if cls.compute(astr) != expected:
+                return f"Bad CRC32 for {[astr]}: {cls.compute_hex(astr)}"
+        if cls.compute("redundant") != cls.compute("cyjefpl"):
+            return "Miss: 'redundant' vs 'cyjefpl'"
+        return ""
+
+    @classmethod
+    def _has_native(cls) -> bool:
+        return cls.use_native and _native_crc32 is not None and cls.POLY == CRC32.POLY
+
+    @classmethod
+    def _update_bitwise(cls, crc: int, data: bytes) -> int:
+        """ Reference implementation, 8 shifts per byte. """
+        for b in data:
+            crc ^= b
+            for _ in range(8):
+                crc = (crc >> 1) ^ (cls.POLY if (crc & 1) else 0)
+        return crc
+
+    @classmethod
+    def _update_sliced(cls, crc: int, data: bytes) -> int:
+        """ Slicing-by-8: eight table lookups per 8 bytes. """
+        t0, t1, t2, t3, t4, t5, t6, t7 = cls.tables()
+        size = len(data)
+        stop = size - (size % 8)
+        for idx in range(0, stop, 8):
+            crc ^= data[idx] | (data[idx+1] << 8) | (data[idx+2] << 16) | (data[idx+3] << 24)
+            crc = (
+                t7[crc & 0xFF] ^ t6[(crc >> 8) & 0xFF]
+                ^ t5[(crc >> 16) & 0xFF] ^ t4[crc >> 24]
+                ^ t3[data[idx+4]] ^ t2[data[idx+5]]
+                ^ t1[data[idx+6]] ^ t0[data[idx+7]]
+            )
+        for idx in range(stop, size):
+            crc = (crc >> 8) ^ t0[(crc ^ data[idx]) & 0xFF]
+        return crc
+
+
+class CRC32C(CRC32):
+    """ CRC-32C (Castagnoli), a second 32-bit hash independent from CRC32 """
+    POLY = 0x82F63B78
+
+
+def crc32_combine(crc_a: int, crc_b: int, len_b: int, poly: int = CRC32.POLY) -> int:
+    """ Returns CRC32 of the concatenation A+B (as zlib crc32_combine).
+    Short 'len_b' (the usual per-row case) is shifted byte-by-byte through
+    the lookup table; longer ones use GF(2) matrix squaring.
+    """
+    assert len_b >= 0, "len_b"
+    if len_b < 64:
+        table = _tables_for(poly)[0]
+        crc = crc_a
+        for _ in range(len_b):
+            crc = (crc >> 8) ^ table[crc & 0xFF]
+        return crc ^ crc_b
+    # Operator for one zero bit, then for 2 and 4 zero bits
+    odd = [poly] + [1 << idx for idx in range(31)]
+    even = _gf2_square(odd)
+    odd = _gf2_square(even)
+    crc = crc_a
+    while len_b:
+        even = _gf2_square(odd)
+        if len_b & 1:
+            crc = _gf2_times(even, crc)
+        len_b >>= 1
+        if not len_b:
+            break
+        odd = _gf2_square(even)
+        if len_b & 1:
+            crc = _gf2_times(odd, crc)
+        len_b >>= 1
+    return crc ^ crc_b
+
+
+def file_crc32(path: str, chunk_size: int = 65536) -> tuple:
+    """ Returns (size, crc) of file 'path', read in memoryview chunks. """
+    acrc = CRC32()
+    size = 0
+    buf = bytearray(chunk_size)
+    view = memoryview(buf)
+    with open(path, "rb") as fdin:
+        while True:
+            n_read = fdin.readinto(buf)
+            if not n_read:
+                break
+            acrc.update(view[:n_read])
+            size += n_read
+    return size, acrc.digest()
+
+
+def _gf2_times(mat, vec: int) -> int:
+    res, idx = 0, 0
+    while vec:
+        if vec & 1:
+            res ^= mat[idx]
+        vec >>= 1
+        idx += 1
+    return res
+
+
+def _gf2_square(mat) -> list:
+    return [_gf2_times(mat, mat[idx]) for idx in range(32)]
+
+
+def _tables_for(poly: int) -> tuple:
+    there = CRC32._tables.get(poly)
+    if there is None:
+        there = _make_tables(poly, CRC32.SLICES)
+        CRC32._tables[poly] = there
+    return there
+
+
+def numpy_module():
+    """ Returns numpy, imported on first use. """
+    assert HAS_NUMPY, "NumPy required"
+    if not _NUMPY:
+        import numpy	# pylint: disable=import-outside-toplevel
+        _NUMPY.append(numpy)
+    return _NUMPY[0]
+
+
+def pack_keys(strs) -> tuple:
+    """ Returns (matrix, lengths): ASCII keys as a zero-padded uint8 matrix,
+    one row per key, and the key lengths.
+    """
+    numpy = numpy_module()
+    datas = [astr.encode("ascii") for astr in strs]
+    lengths = numpy.fromiter((len(data) for data in datas), dtype=numpy.int64, count=len(datas))
+    width = int(lengths.max()) if datas else 0
+    buf = numpy.frombuffer(
+        b"".join(data.ljust(width, b"\0") for data in datas),
+        dtype=numpy.uint8,
+    )
+    return buf.reshape(len(datas), width), lengths
+
+
+def _make_tables(poly: int, slices: int) -> tuple:
+    """ Returns 'slices' lookup tables of 256 entries each. """
+    first = []
+    for idx in range(256):
+        crc = idx
+        for _ in range(8):
+            crc = (crc >> 1) ^ (poly if (crc & 1) else 0)
+        first.append(crc)
+    res = [tuple(first)]
+    for _ in range(1, slices):
+        prev = res[-1]
+        res.append(tuple((crc >> 8) ^ first[crc & 0xFF] for crc in prev))
+    return tuple(res)
+
+
+class CRCCache:
+    """ Bounded LRU cache of CRC32 hex strings.
+    Capped both by entries and by (approximate) key bytes; clear() drops
+    every cached key, so references do not linger in memory.
+    """
+    def __init__(self, max_entries=65536, max_bytes=4 * 1024 * 1024, crc_class=CRC32):
+        assert max_entries > 0, "max_entries"
+        self.max_entries, self.max_bytes = max_entries, max_bytes
+        self._crc_class = crc_class
+        self._dict = OrderedDict()
+        self._size = 0
+        self.hits, self.misses = 0, 0
+
+    def __len__(self):
+        return len(self._dict)
+
+    def get(self, astr: str) -> str:
+        there = self._dict.get(astr)
+        if there is not None:
+            self.hits += 1
+            self._dict.move_to_end(astr)
+            return there
+        self.misses += 1
+        hstr = self._crc_class.compute_hex(astr)
+        self._add(astr, hstr)
+        return hstr
+
+    def get_many(self, strs) -> list:
+        """ Returns the hex strings of 'strs', computing misses in one batch. """
+        strs = list(strs)
+        dct = self._dict
+        todo = [astr for astr in set(strs) if astr not in dct]
+        self.misses += len(todo)
+        self.hits += len(strs) - len(todo)
+        new = dict(zip(todo, self._crc_class.compute_many(todo)))
+        res = [new[astr] if astr in new else dct[astr] for astr in strs]
+        for astr in set(strs).difference(new):
+            dct.move_to_end(astr)
+        for astr, hstr in new.items():
+            self._add(astr, hstr)
+        return res
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._dict),
+            "bytes": self._size,
+        }
+
+    def clear(self):
+        """ Drops all entries and resets counters. """
+        self._dict.clear()
+        self._size = 0
+        self.hits, self.misses = 0, 0
 
-#def crc32_hex(astr: str) -> str:
-#    ivalue = zlib.crc32(astr.encode('ascii'))
-#    res = f"{ivalue & 0xffffffff:08X}"
-#    return res
+    def _add(self, astr, hstr):
+        if astr in self._dict:
+            return
+        self._dict[astr] = hstr
+        self._size += len(astr)
+        while self._dict and (
+            len(self._dict) > self.max_entries or self._size > self.max_bytes
+        ):
+            old, _ = self._dict.popitem(last=False)
+            self._size -= len(old)
@@ -0,0 +1,136 @@
+# pprofile.py  (c)2026  Henrique Moreira
+
+""" Opt-in per-phase profiling: wall time, rows and allocations
+"""
+
+# pylint: disable=missing-function-docstring
+
+import os
+import time
+
+# json and tracemalloc are only imported when profiling is enabled
+
+# "1": profile (results as dict); "time": the same, without allocations;
+# other values: also a JSON lines file path
+PROFILE_ENV = "PCHECKERS_PROFILE"
+
+# Wall time only: tracemalloc slows the profiled code several times
+TIME_ONLY = "time"
+
+
+class Profiler:
+    """ Records, per phase: calls, seconds, rows, allocated and peak bytes.
+    'profile' is False, True, "time" (no allocations, so seconds are not
+    inflated by tracemalloc), or a JSON lines path (one line per phase run);
+    None reads the environment variable PCHECKERS_PROFILE.
+    """
+
+    def __init__(self, profile=None, who=""):
+        if profile is None:
+            profile = os.environ.get(PROFILE_ENV, "")
+            profile = True if profile == "1" else ("" if profile == "0" else profile)
+        self.enabled = bool(profile)
+        self.who = who
+        self.memory = profile != TIME_ONLY
+        self.path = profile if isinstance(profile, str) and self.memory else ""
+        self._results = {}
+        self._stack = []	# running phases: [record, start memory, peak]
+        self._tracing = False
+
+    def phase(self, name):
+        """ Context manager; yields the phase record, where 'rows' may be set. """
+        if not self.enabled:
+            return _NoPhase()
+        return _Phase(self, name)
+
+    def results(self) -> dict:
+        """ Returns phase -> {calls, secs, rows, alloc_bytes, peak_bytes};
+        without the byte counts in "time" mode.
+        """
+        return {name: dict(item) for name, item in self._results.items()}
+
+    def clear(self):
+        self._results = {}
+
+    def _enter(self, rec):
+        if not self.memory:
+            rec["start"] = time.perf_counter()
+            return
+        import tracemalloc	# pylint: disable=import-outside-toplevel
+        if not self._stack and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        cur, peak = tracemalloc.get_traced_memory()
+        if self._stack:
+            outer = self._stack[-1]
+            outer[2] = max(outer[2], peak)
+        tracemalloc.reset_peak()
+        self._stack.append([rec, cur, cur])
+        rec["start"] = time.perf_counter()
+
+    def _leave(self, rec):
+        secs = time.perf_counter() - rec.pop("start")
+        if not self.memory:
+            rec["secs"] = secs
+            self._add(rec)
+            return
+        import tracemalloc	# pylint: disable=import-outside-toplevel
+        cur, peak = tracemalloc.get_traced_memory()
+        _, mem, top = self._stack.pop()
+        top = max(top, peak)
+        if self._stack:
+            outer = self._stack[-1]
+            outer[2] = max(outer[2], top)
+        elif self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+        rec["secs"] = secs
+        rec["alloc_bytes"] = cur - mem
+        rec["peak_bytes"] = top - mem
+        self._add(rec)
+
+    def _add(self, rec):
+        item = self._results.get(rec["phase"])
+        if item is None:
+            item = {"calls": 0, "secs": 0.0, "rows": 0}
+            if self.memory:
+                item.update({"alloc_bytes": 0, "peak_bytes": 0})
+            self._results[rec["phase"]] = item
+        item["calls"] += 1
+        item["secs"] += rec["secs"]
+        item["rows"] += rec["rows"]
+        if self.memory:
+            item["alloc_bytes"] += rec["alloc_bytes"]
+            item["peak_bytes"] = max(item["peak_bytes"], rec["peak_bytes"])
+        if self.path:
+            import json	# pylint: disable=import-outside-toplevel
+            with open(self.path, "a", encoding="ascii") as fdout:
+                fdout.write(json.dumps(rec, sort_keys=True) + "\n")
+
+
+class _Phase:
+    """ One profiled phase run. """
+    __slots__ = ("_prof", "_rec")
+
+    def __init__(self, prof, name):
+        self._prof = prof
+        self._rec = {"who": prof.who, "phase": name, "rows": 0}
+
+    def __enter__(self):
+        self._prof._enter(self._rec)	# pylint: disable=protected-access
+        return self._rec
+
+    def __exit__(self, *exc):
+        self._prof._leave(self._rec)	# pylint: disable=protected-access
+        return False
+
+
+class _NoPhase:
+    """ Profiling disabled: nothing is recorded. """
+    __slots__ = ()
+
+    def __enter__(self):
+        return {}
+
+    def __exit__(self, *exc):
+        return False
@@ -0,0 +1,184 @@
+# pquery.py  (c)2026  Henrique Moreira
+
+""" Secondary indexes, and queries, over ADatabase accounts; reverse CRC32 index
+"""
+
+# pylint: disable=missing-function-docstring
+
+from bisect import bisect_left
+from .poly import CRC32C
+
+
+class AIndex:
+    """ Accounts by user, by pass reference, by rank and by CRC32 prefix. """
+
+    def __init__(self, adb):
+        tree = adb.get_tree()
+        self._accs = tree["a"]
+        ranks = tree["g"]
+        self.by_user, self.by_rank = {}, {}
+        self.by_pass_ref = tree["d"]	# p_ref -> [(key, user, crc), ...]
+        self._rank_of = {}
+        for key, (user, _) in self._accs.items():
+            rank = ranks.get(key)
+            rnum = None if rank is None else rank[0]	# None: no rank
+            self._rank_of[key] = rnum
+            append_to(self.by_user, user, key)
+            append_to(self.by_rank, rnum, key)
+        self._crc_of = {}	# p_ref -> crc
+        by_crc = []
+        for p_ref, seq in self.by_pass_ref.items():
+            if not seq:
+                continue
+            h_crc = seq[0][2]
+            self._crc_of[p_ref] = h_crc
+            by_crc += [(h_crc, trip[0]) for trip in seq]
+        by_crc.sort()
+        self._crcs = [h_crc for h_crc, _ in by_crc]
+        self._crc_keys = [key for _, key in by_crc]
+
+    def by_crc_prefix(self, prefix: str) -> list:
+        """ Returns account keys whose pass reference CRC32 starts with 'prefix'. """
+        prefix = prefix.upper()
+        low = bisect_left(self._crcs, prefix)
+        high = bisect_left(self._crcs, prefix + "~", low)
+        return self._crc_keys[low:high]
+
+    def rank_of(self, key):
+        return self._rank_of[key]
+
+    def crc_of(self, key) -> str:
+        return self._crc_of[self._accs[key][1]]
+
+    def select(self, user=None, p_ref=None, rank=None, crc_prefix=None):
+        """ Yields account keys matching all given filters.
+        'rank' is a number, or an iterable of numbers (None means: no rank).
+        The smallest index hit is walked, other filters are tested per key.
+        """
+        ranks = None
+        if rank is not None:
+            ranks = {rank} if isinstance(rank, int) else set(rank)
+        cands, tests = [], []
+        if user is not None:
+            cands.append(self.by_user.get(user, ()))
+            tests.append(lambda key: self._accs[key][0] == user)
+        if p_ref is not None:
+            cands.append([trip[0] for trip in self.by_pass_ref.get(p_ref, ())])
+            tests.append(lambda key: self._accs[key][1] == p_ref)
+        if ranks is not None:
+            cands.append([key for rnum in ranks for key in self.by_rank.get(rnum, ())])
+            tests.append(lambda key: self._rank_of[key] in ranks)
+        if crc_prefix:
+            cands.append(self.by_crc_prefix(crc_prefix))
+            tests.append(lambda key: self.crc_of(key).startswith(crc_prefix.upper()))
+        if not cands:
+            yield from self._accs
+            return
+        best = min(range(len(cands)), key=lambda idx: len(cands[idx]))
+        others = tests[:best] + tests[best + 1:]
+        for key in cands[best]:
+            if all(test(key) for test in others):
+                yield key
+
+
+def append_to(adict, key, value):
+    """ Appends 'value' to the list at adict[key] (a new list if missing). """
+    there = adict.get(key)
+    if there is None:
+        adict[key] = [value]
+    else:
+        there.append(value)
+
+
+class CRCIndex:
+    """ Reverse CRC32 index: h_crc -> [p_ref, ...], and p_ref -> h_crc,
+    persisted as pcrc.mi (rows 'hid;p_ref', see hid_of()).
+    The second row, '#@accs=SIZE:CRC;pmap=SIZE:CRC', stamps the tables it was built from.
+    """
+    header = "#crc32.1;p_ref"
+
+    def __init__(self, stamp=""):
+        self.stamp = stamp
+        self.by_crc = {}
+        self.crc_of = {}
+
+    def __len__(self):
+        return len(self.crc_of)
+
+    def add(self, h_crc, p_ref):
+        self.crc_of[p_ref] = h_crc
+        append_to(self.by_crc, h_crc, p_ref)
+
+    def lookup(self, h_crc) -> list:
+        return self.by_crc.get(h_crc.upper(), [])
+
+    def hid_of(self, p_ref) -> str:
+        """ Returns the hash id: 'crc32.1' if the CRC32 is unique,
+        otherwise 'crc32.n.crc32c' (n: bucket size), CRC-32C telling clashes apart.
+        """
+        h_crc = self.crc_of[p_ref]
+        size = len(self.by_crc[h_crc])
+        if size == 1:
+            return f"{h_crc}.1"
+        return f"{h_crc}.{size}.{CRC32C.compute_hex(p_ref)}"
+
+    def resolve(self, hid):
+        """ Returns the pass reference of hash id 'hid', or None. """
+        parts = hid.upper().split(".")
+        h_crc, second = parts[0], parts[2] if len(parts) > 2 else ""
+        bucket = self.by_crc.get(h_crc, ())
+        if len(bucket) == 1 and not second:
+            return bucket[0]
+        for p_ref in bucket:
+            if CRC32C.compute_hex(p_ref) == second:
+                return p_ref
+        return None
+
+    def rows(self, first=()):
+        """ Yields the file lines: header, stamp, pass references in 'first', then the others. """
+        yield CRCIndex.header
+        yield f"#@{self.stamp}"
+        done = set()
+        for p_ref in first:
+            done.add(p_ref)
+            yield self._row(p_ref)
+        for p_ref in sorted(self.crc_of):
+            if p_ref not in done:
+                yield self._row(p_ref)
+
+    def _row(self, p_ref) -> str:
+        return f"{self.hid_of(p_ref)};{p_ref}"
+
+    @staticmethod
+    def from_buckets(buckets, stamp):
+        """ Builds the index from CRC buckets (tree 'e'). """
+        idx = CRCIndex(stamp)
+        for h_crc in sorted(buckets):
+            bucket = sorted(buckets[h_crc])
+            if len(bucket) > 1:
+                seconds = {CRC32C.compute(p_ref) for p_ref in bucket}
+                assert len(seconds) == len(bucket), f"CRC32 and CRC-32C clash: {bucket}"
+            for p_ref in bucket:
+                idx.add(h_crc, p_ref)
+        return idx
+
+    @staticmethod
+    def load(path, stamp, encoding="ascii"):
+        """ Returns the index read from 'path', or None if missing or stale. """
+        try:
+            with open(path, "r", encoding=encoding) as fdin:
+                lines = fdin.read().splitlines()
+        except FileNotFoundError:
+            return None
+        if lines[:2] != [CRCIndex.header, f"#@{stamp}"]:
+            return None
+        idx = CRCIndex(stamp)
+        for line in lines[2:]:
+            s_crc, p_ref = line.split(";", maxsplit=1)
+            idx.add(s_crc.split(".", maxsplit=1)[0], p_ref)
+        return idx
+
+
+def crc_stamp(sums) -> str:
+    """ Returns 'accs=SIZE:CRC;pmap=SIZE:CRC', given (size, crc) per mi-file. """
+    return ";".join(f"{mif}={sums[mif][0]}:{sums[mif][1]:08X}" for mif in ("accs", "pmap"))
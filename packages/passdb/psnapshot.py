@@ -0,0 +1,146 @@
+# psnapshot.py  (c)2026  Henrique Moreira
+
+""" Binary snapshot of a parsed ADatabase, for fast startup
+"""
+
+# pylint: disable=missing-function-docstring
+
+import gc
+import marshal
+import os
+import stat
+import struct
+import sys
+import zlib
+from .poly import file_crc32
+
+SNAP_MAGIC = b"PWSNAP"
+SNAP_VERSION = 2	# 2: tree "e" holds sets
+
+# magic, snapshot version, python major.minor (marshal format), payload length, payload crc
+_HEADER = struct.Struct("<6sHBBII")
+
+
+def default_snapshot_dir() -> str:
+    """ Returns ~/.cache/pcheckers """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "pcheckers")
+
+
+class Snapshot:
+    """ One snapshot file per mi-files base directory. """
+
+    def __init__(self, basedir, snap_dir=""):
+        assert basedir, "basedir"
+        self.basedir = basedir
+        self.snap_dir = snap_dir if snap_dir else default_snapshot_dir()
+        self.msg = ""
+        name = f"adb-{zlib.crc32(basedir.encode('utf-8')):08X}.snap"
+        self.path = os.path.join(self.snap_dir, name)
+
+    def load(self):
+        """ Returns the saved state (dict), or None if missing, stale or corrupt.
+        mi-files are compared by size, mtime and CRC32 (of the content, as loaded).
+        """
+        self.msg = ""
+        try:
+            with open(self.path, "rb") as fdin:
+                if not self._is_private(os.fstat(fdin.fileno())):
+                    return self._miss("Not private (0600)")
+                data = fdin.read()
+        except FileNotFoundError:
+            return self._miss("No snapshot")
+        except OSError as err:
+            return self._miss(f"Cannot read snapshot: {err}")
+        state = self._decode(data)
+        if state is None:
+            return None
+        if state.get("basedir") != self.basedir:
+            return self._miss("Other basedir")
+        for mif, tup in state["sums"].items():
+            if not self._is_same(mif, tup):
+                return self._miss(f"Stale: {mif}")
+        return state
+
+    def save(self, state: dict) -> bool:
+        """ Writes the snapshot atomically, with 0600 permissions. """
+        payload = marshal.dumps(state)
+        head = _HEADER.pack(
+            SNAP_MAGIC, SNAP_VERSION,
+            sys.version_info[0], sys.version_info[1],
+            len(payload), zlib.crc32(payload),
+        )
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.snap_dir, mode=0o700, exist_ok=True)
+            fdout = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except OSError as err:
+            self.msg = f"Cannot save snapshot: {err}"
+            return False
+        try:
+            with os.fdopen(fdout, "wb") as fout:
+                fout.write(head)
+                fout.write(payload)
+                fout.flush()
+                os.fsync(fout.fileno())
+            os.replace(tmp, self.path)
+        except OSError as err:
+            self.msg = f"Cannot save snapshot: {err}"
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            return False
+        return True
+
+    def remove(self) -> bool:
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def _decode(self, data):
+        if len(data) < _HEADER.size:
+            return self._miss("Corrupt: too short")
+        magic, version, major, minor, size, crc = _HEADER.unpack_from(data)
+        if magic != SNAP_MAGIC:
+            return self._miss("Corrupt: bad magic")
+        if version != SNAP_VERSION or (major, minor) != sys.version_info[:2]:
+            return self._miss(f"Other version: {version} ({major}.{minor})")
+        payload = memoryview(data)[_HEADER.size:]
+        if len(payload) != size or zlib.crc32(payload) != crc:
+            return self._miss("Corrupt: bad length or CRC")
+        # Many small containers: skip GC passes while they are created
+        was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            state = marshal.loads(payload)
+        except (EOFError, ValueError, TypeError):
+            return self._miss("Corrupt: payload")
+        finally:
+            if was_enabled:
+                gc.enable()
+        if not isinstance(state, dict):
+            return self._miss("Corrupt: payload")
+        return state
+
+    def _is_same(self, mif, tup) -> bool:
+        size, mtime, crc = tup
+        path = os.path.join(self.basedir, mif) + ".mi"
+        try:
+            stt = os.stat(path)
+            if (stt.st_size, stt.st_mtime_ns) != (size, mtime):
+                return False
+            return file_crc32(path) == (size, crc)
+        except OSError:
+            return False
+
+    def _is_private(self, stt) -> bool:
+        if stat.S_IMODE(stt.st_mode) & 0o077:
+            return False
+        if hasattr(os, "getuid") and stt.st_uid != os.getuid():
+            return False
+        return True
+
+    def _miss(self, msg):
+        self.msg = msg
+        return None
@@ -5,7 +5,10 @@
 # pylint: disable=missing-function-docstring
 
 import sys
+import time
 import passdb
+from passdb import poly
+from passdb.pdatabase import up_key
 
 SHOW_SECRETS = True
 
@@ -26,6 +29,15 @@ def do_script(args):
     if cmd == "a":
         tup = do_show_referenced()
         return tup
+    if cmd == "top":
+        tup = do_show_referenced(20)
+        return tup
+    if cmd == "crc":
+        return 0, bench_crc()
+    if cmd == "mem":
+        return 0, show_footprint()
+    if cmd == "upkey":
+        return 0, bench_up_key()
     print("Invalid command:", cmd)
     return None
 
@@ -33,9 +45,11 @@ def do_script(args):
 def do_basic_test():
     """ Basic showing test. """
     poly_test()
-    adb = passdb.ADatabase(name="mydata")
+    adb = passdb.ADatabase(name="mydata", snapshot=True)
     if adb.msg:
         print("ERROR:", adb.msg)
+        for viol in adb.validate():
+            print("-", passdb.pdatabase.violation_str(viol))
         return 1, adb
     dump_sev(adb, SHOW_SECRETS)
     print("----\n" + "ADatabase().get_basedir():", adb.get_basedir())
@@ -48,8 +62,9 @@ def dump_sev(adb, show_secret=False):
     dct = adb.get_tree()["d"]
     pwd_key = adb.get_tree()["c"]
     #print(pwd_key, end=("\n" + "++" * 20 + "\n\n"))
+    crc_of = adb.crc_index().crc_of
     for key, item in dct.items():
-        s_hex = passdb.CRC32.compute_hex(key)
+        s_hex = crc_of[key]
         a_pass = pwd_key[key]
         shown = [key, a_pass] if show_secret else [key]
         print(
@@ -73,15 +88,72 @@ def poly_test():
     print(hex1, astr1)
     print(hex2, astr2)
     assert hex1 == hex2, "Miss!"
+    msg = passdb.CRC32.self_check()
+    assert not msg, msg
     print("+++" * 8)
 
 
-def do_show_referenced():
+def bench_crc(n_keys=200000, key_len=12) -> dict:
+    """ Benchmark CRC32 scalar (table-driven), zlib and NumPy vectorized paths. """
+    keys = [f"{idx:0{key_len}x}"[-key_len:] for idx in range(n_keys)]
+    res = {}
+    paths = [("scalar", False, False), ("zlib", True, False)]
+    if poly.HAS_NUMPY:
+        paths.append(("numpy", False, True))
+    expected = None
+    for name, native, vectorized in paths:
+        passdb.CRC32.use_native = native
+        start = time.perf_counter()
+        hexes = passdb.CRC32.compute_many(keys, vectorized=vectorized)
+        res[name] = time.perf_counter() - start
+        if expected is None:
+            expected = hexes
+        assert hexes == expected, f"Path mismatch: {name}"
+    passdb.CRC32.use_native = True
+    for name, secs in res.items():
+        print(f"{name:<8} {n_keys} keys: {secs * 1000:9.1f} ms")
+    if not poly.HAS_NUMPY:
+        print("numpy    (not installed)")
+    return res
+
+
+def bench_up_key(n_keys=1000000) -> dict:
+    """ Benchmark up-key normalization: per-char loop vs translate tables. """
+    keys = [f"Account {idx:07d}.example" for idx in range(n_keys)]
+    res = {}
+    for name, func in (
+        ("loop", lambda key: ''.join([achr.upper() for achr in key if achr > ' '])),
+        ("up_key", up_key),
+    ):
+        start = time.perf_counter()
+        ups = [func(key) for key in keys]
+        res[name] = time.perf_counter() - start
+        assert ups[-1] == f"ACCOUNT{n_keys - 1:07d}.EXAMPLE", name
+    for name, secs in res.items():
+        print(f"{name:<8} {n_keys} keys: {secs * 1000:9.1f} ms")
+    return res
+
+
+def show_footprint(name="mydata") -> dict:
+    """ Bytes per account, with plain dictionaries and compact columns. """
+    res = {}
+    for compact in (False, True):
+        adb = passdb.ADatabase(name=name, compact=compact)
+        res[compact] = adb.footprint()
+        shown = "compact" if compact else "dicts"
+        print(f"{shown:<8}", res[compact])
+    return res
+
+
+def do_show_referenced(k=0):
     """ Show referenced passwords, ordered by descendant number of references.
-    Only counts when stuff is of relevance.
+    Only counts when stuff is of relevance; k > 0 shows the top 'k' only.
     """
-    adb = passdb.ADatabase(name="mydata")
+    adb = passdb.ADatabase(name="mydata", snapshot=True)
     pha = passdb.PHasher(adb)
+    if k > 0:
+        pha.dump_important(k=k)
+        return 0, adb
     pha.builder()
     pha.dump_important()
     is_ok = pha.brute_save()
@@ -10,7 +10,9 @@ Author: Henrique Moreira, henrique@declaratived.com
 # pylint: disable=consider-using-ternary, too-many-locals
 
 import os.path
+from passdb.pprofile import Profiler
 from pword import fileaccess, stable
+from pword.titleindex import TitleIndex
 
 debug_areas = ["mil", "nav"]
 
@@ -38,6 +40,9 @@ TBL_BASIC_INVALID = (
     "info",
 )
 
+# Rank assumed for accounts not listed at rank.mi
+DEF_RANK_WHEN_MISSING = 4
+
 TBL_ALLOWED_VALUE_GEN = (
     "info", # values may contain ':'
 )
@@ -70,8 +75,12 @@ class MiLot(MiAny):
     # _map_names = {}
     dbm = None
 
-    def __init__(self, map_names=None, alt_tables=False, name=None):
+    def __init__(self, map_names=None, alt_tables=False, name=None, profile=None):
+        """ 'profile' (True, "time", or a JSON lines path) records each phase,
+        see profile(); None uses PCHECKERS_PROFILE, see passdb/pprofile.py
+        """
         super().__init__(MiAny.DEF_MI_NAME if name is None else name)
+        self.profiler = Profiler(profile, self.name)
         self._map_names = _MAP_NAMES if map_names is None else map_names
         assert isinstance(self._map_names, dict), self.name
         self._process_alt = alt_tables
@@ -80,6 +89,10 @@ class MiLot(MiAny):
             "rank",
         )
         self._db_alt = tuple(sorted(ALT_NAMES))
+        self._creds = None	# see cred_table()
+        self._search = None	# see title_index()
+        self._queries = 0	# filtered matching() calls, see matching()
+        self._last = (None, None)	# last filtered matching(): (a_filter, found)
 
     def get_str(self) -> str:
         assert self.dbm
@@ -97,8 +110,12 @@ class MiLot(MiAny):
             res += f";({xtra})"
         return res
 
-    def process_path(self, path, dump_level=0, debug=0) -> int:
+    def process_path(self, path, dump_level=0, debug=0, jobs=0, pool="auto") -> int:
         """ Main path processor!
+        With jobs > 1 tables are read and hashed concurrently, by a
+        "thread" or "process" pool ("auto": threads, as pickling tables
+        back from processes costs more than it saves);
+        return codes and messages are the same as sequentially.
         """
         assert isinstance(path, str), self.name
         assert int(dump_level) >= 0, "dump_level!"
@@ -116,29 +133,34 @@ class MiLot(MiAny):
                            ALT_NAMES[name][0]) for name in self._db_alt
             ]
         aprint('mil', debug, "Items:", checks)
-        dbm = {}
+        self._creds, self._search, self._queries = None, None, 0
+        self._last = (None, None)
+        todo = []
         for one in checks:
             what = self.what_kind(one)
-            aprint('mil', debug, f"Check, kind={what}: {one}")
             assert what
-            if what in ("pmap",):
-                tbl = stable.STableKey(one, "")
+            invalid = "?" if what in TBL_BASIC_INVALID else _invalid_chrs
+            todo.append((what, one, invalid))
+        results = self._load_parallel(todo, jobs, pool) if jobs > 1 else None
+        dbm = {}
+        for idx, (what, one, invalid) in enumerate(todo):
+            aprint('mil', debug, f"Check, kind={what}: {one}")
+            if results is None:
+                code, tbl = load_table(what, one, invalid, self.profiler)
             else:
-                unique = what in TBL_W_UNIQUE_KEYS
-                s_val_join = ";" if what in ALT_NAMES else "="
-                tbl = stable.STableKey(one, s_val_join, unique)
-            if tbl.get_msg():
+                err, (code, tbl) = results[idx]
+                if err is not None:
+                    raise err	# as sequentially, when this table is reached
+                if code == 1 and tbl.get_msg():
+                    print(f"Error: {tbl.get_msg()}")
+            if code == 3:
                 print(f"Uops, STableKey(): {tbl.get_msg()}")
                 return 3
-            if what in TBL_BASIC_INVALID:
-                is_ok = tbl.hash_key("?")
-            else:
-                is_ok = tbl.hash_key(_invalid_chrs)
             aprint('mil', int(debug >= 3),
                    f"STableKey({one}): "
-                   f"is_ok? {is_ok} '{tbl.get_msg()}'\n{tbl.get_rows()}\n<--\n")
-            if not is_ok:
-                return 1
+                   f"is_ok? {code == 0} '{tbl.get_msg()}'\n{tbl.get_rows()}\n<--\n")
+            if code:
+                return code
             dbm[what] = tbl
             if dump_level > 0:
                 self.dump_table(tbl, what, debug)
@@ -161,6 +183,17 @@ class MiLot(MiAny):
             res.append(tbl)
         return res
 
+    def profile(self) -> dict:
+        """ Returns per-phase profiling results (empty if not profiling):
+        read.<what>, parse.<what>, _check_triplets, _check_info.
+        """
+        return self.profiler.results()
+
+    def checksums(self) -> dict:
+        """ Returns (size, crc32) per table, as read by process_path(). """
+        assert self.dbm, self.name
+        return {what: tbl.get_checksum() for what, tbl in self.dbm.items()}
+
     def dump_db(self, show_pass=False, debug=0):
         assert self.dbm, self.name
         aprint('mil', debug, f"dump_db(show_pass={show_pass}): {self.name}")
@@ -216,13 +249,17 @@ class MiLot(MiAny):
         rank = dbm.get("rank")
         if not (usrs and accs and pmap):
             return False
-        is_ok = self._check_triplets(
-            (usrs, accs, pmap),
-            (rank,),
-            debug
-        )
+        with self.profiler.phase("_check_triplets") as rec:
+            is_ok = self._check_triplets(
+                (usrs, accs, pmap),
+                (rank,),
+                debug
+            )
+            rec["rows"] = len(accs.get_key_list())
         assert is_ok, "check_triplets()"
-        self._check_info(info, accs, debug=debug)
+        with self.profiler.phase("_check_info") as rec:
+            self._check_info(info, accs, debug=debug)
+            rec["rows"] = len(info.get_key_list()) if info else 0
         return True
 
     def _check_info(self, info, accs, debug=0):
@@ -236,81 +273,70 @@ class MiLot(MiAny):
             mprint(debug, f"one={one}, aval={aval}")
             if aval.startswith("F"):	# No check on 'accs'
                 continue
+            if is_ok:
+                continue
             # Check any upper-case match
-            ups, xtra = [elem.upper() for elem in accs.keyval[0]], ""
-            if one.upper() in ups:
+            xtra = ""
+            if accs.upper_match(one) is not None:
                 xtra = " (try fix-case)"
-            if not is_ok:
-                info.report_error(f"Field key '{one}' not in 'accs'{xtra}")
-                return False
+            info.report_error(f"Field key '{one}' not in 'accs'{xtra}")
+            return False
         return True
 
     def _check_triplets(self, trip, other, debug) -> bool:
-        """ Check user, accounts, and password map """
+        """ Check user, accounts, and password map:
+        one pass per table, keys looked up in dictionaries (linear overall).
+        """
         usrs, accs, pmap = trip
         rank = other[0]
-        aprint('mil', debug, "check_triplets():", rank.get_rows())
-        for tbl in (usrs, accs, pmap):
-            items = tbl.get_key_list()
-            first = None
-            for one in items:
-                val = tbl.keyval[0][one]
-                first = tbl.get_rows()[0][1:].strip().split(";")[0]
-                aprint('mil', debug, f"file={tbl.get_origin_file()}, {first} '{one}': {val}")
-            if not items:
-                aprint('mil', debug, f"file={tbl.get_origin_file()}, <empty>")
+        if debug:
+            self._show_triplets(trip, rank, debug)
+        users, pmaps = usrs.key_dict(), pmap.key_dict()
+        lookup = accs.key_dict()
         for account in accs.get_key_list():
-            spl = accs.keyval[0][account].split("=")
+            spl = lookup[account].split("=")
             assert len(spl) == 2, f"spl={spl}"
             user_ref, pass_ref = spl
-            a_pass = pmap.keyval[0].get(pass_ref)
-            shown_user = usrs.keyval[0].get(user_ref)
-            if shown_user is None:
-                shown_user = "?"
-            aprint('mil', debug,
-                   f"account '{account}': user_ref={user_ref},"
-                   f" is: {shown_user}, pass_ref={pass_ref} : {a_pass}")
+            shown_user = users.get(user_ref, "?")
+            if debug:
+                aprint('mil', debug,
+                       f"account '{account}': user_ref={user_ref},"
+                       f" is: {shown_user}, pass_ref={pass_ref} : {pmaps.get(pass_ref)}")
             assert shown_user != "?", f"account={account} user_ref: {user_ref}"
         # All account titles listed at rank should be at accs
-        lookup = accs.key_dict()
+        ranks = rank.key_dict()
         for key in rank.get_key_list():
             assert key in lookup, f"rank: '{key}' not at accs"
-            assert key in accs.get_key_list(), key	# Redundant!
-            val = rank.key_dict()[key]
+            val = ranks[key]
             assert 0 <= int(val[0]) <= 9, val
             if val.endswith("="):
-                rank.key_dict()[key] = val + key
+                ranks[key] = val + key
         return True
 
+    def _show_triplets(self, trip, rank, debug):
+        aprint('mil', debug, "check_triplets():", rank.get_rows())
+        for tbl in trip:
+            items = tbl.get_key_list()
+            first = tbl.get_rows()[0][1:].strip().split(";")[0]	# header, first field
+            name, values = tbl.get_origin_file(), tbl.key_dict()
+            for one in items:
+                aprint('mil', debug, f"file={name}, {first} '{one}': {values[one]}")
+            if not items:
+                aprint('mil', debug, f"file={name}, <empty>")
+
     def credentials(self, a_filter=None, pass_text="plain", if_single=True) -> list:
         """ Returns the complete list of credentials (title, (username, password))
         It yields a single result if if_single=True and a_filter matches (exactly) a single title.
         """
         assert isinstance(if_single, bool), self.name
         assert isinstance(pass_text, str), "Not pass_text=plain?"
-        alist, refs = [], []
+        alist = []
         match = (None, None)
-        #key_to, from_name, accounts = self.dbm["accs"].keyval
-        key_to, _, accounts = self.dbm["accs"].keyval
-        usrs, pmap = self.dbm["users"].keyval, self.dbm["pmap"].keyval
-        for title in accounts:
-            user_ref, pass_ref = key_to[title].split("=")
-            trip = [title, (user_ref, pass_ref)]
-            refs.append(trip)
-        for trip in refs:
-            title = trip[0]
-            # convert element#1 (username, password) from other tables
-            username = usrs[0][trip[1][0]]
-            pass_ref = trip[1][1]
-            try:
-                passwd = pmap[0][pass_ref] if pass_text == "plain" else pass_ref
-            except KeyError:
-                passwd = "*" + pass_ref
-            pair = (username, passwd)
-            if self._show_title(title, a_filter):
-                alist.append((title, pair))
-                if a_filter is not None and title == a_filter:
-                    match = (title, pair)
+        for rec in self.matching(a_filter):
+            pair = rec.pair(pass_text)
+            alist.append((rec.title, pair))
+            if rec.title == a_filter:
+                match = (rec.title, pair)
         if len(alist) > 1 and if_single and match[0] is not None:
             # Exact match?, only show that in this case
             res = [match]
@@ -318,11 +344,96 @@ class MiLot(MiAny):
             res = alist
         return res
 
+    def matching(self, a_filter=None, by_rank=False) -> list:
+        """ Returns the credential records whose title matches 'a_filter',
+        in accounts order, or by rank (then title) if 'by_rank'.
+        The first filtered query scans the titles (one-shot lookups build
+        nothing else); later ones use title_index().
+        Repeating the last filter (e.g. to get it by rank) reuses its result.
+        """
+        if a_filter is None:
+            found = self.cred_table()
+        elif a_filter == self._last[0]:
+            found = self._last[1]
+        else:
+            if self._ignore_case and (self._queries or self._search is not None):
+                recs = self.cred_table()
+                found = [recs[idx] for idx in self.title_index().find(a_filter)]
+            else:
+                found = self._scan(a_filter)
+            self._queries += 1
+            self._last = (a_filter, found)
+        if by_rank:
+            return sorted(found, key=Credential.rank_key)
+        return found
+
+    def title_index(self):
+        """ Returns the title search index (see titleindex.py), built once per process_path(). """
+        if self._search is None:
+            self._search = TitleIndex(self.dbm["accs"].get_key_list())
+        return self._search
+
+    def cred_table(self) -> list:
+        """ Returns the credentials (Credential records), in accounts order;
+        built once per process_path().
+        """
+        if self._creds is None:
+            assert self.dbm, self.name
+            self._creds = self._build_creds(self.dbm["accs"].get_key_list())
+        return self._creds
+
+    def _scan(self, a_filter) -> list:
+        """ Linear search, see _show_title(). """
+        if self._creds is not None:
+            return [rec for rec in self._creds if self._show_title(rec.title, a_filter)]
+        assert self.dbm, self.name
+        titles = self.dbm["accs"].get_key_list()
+        return self._build_creds([title for title in titles if self._show_title(title, a_filter)])
+
+    def _build_creds(self, titles) -> list:
+        """ Returns the Credential records of 'titles'. """
+        key_to = self.dbm["accs"].key_dict()
+        usrs, pmap = self.dbm["users"].key_dict(), self.dbm["pmap"].key_dict()
+        rank = self.dbm.get("rank")
+        ranks = rank.key_dict() if rank else {}
+        res = []
+        for title in titles:
+            user_ref, pass_ref = key_to[title].split("=")
+            a_rank = ranks.get(title)
+            res.append(Credential(
+                title, usrs[user_ref], pass_ref, pmap.get(pass_ref),
+                None if a_rank is None else int(a_rank.split("=", maxsplit=1)[0]),
+            ))
+        return res
+
     def what_kind(self, fname):
         """ Returns kind of file, e.g. 'accs', or None if not found. """
         name = os.path.basename(fname)
         return self._map_mi_to_kind.get(name)
 
+    def _load_parallel(self, todo, jobs, pool) -> list:
+        """ Returns (exception, (code, tbl)) per table, in 'todo' order;
+        exception is None, or what load_table() raised.
+        """
+        # pylint: disable=import-outside-toplevel
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+        if pool == "auto":
+            pool = "thread"
+        assert pool in ("thread", "process"), pool
+        executor = ProcessPoolExecutor if pool == "process" else ThreadPoolExecutor
+        with self.profiler.phase(f"load.{pool}") as rec:
+            with executor(max_workers=jobs) as exe:
+                futs = [
+                    exe.submit(load_table, what, one, invalid, None, False)
+                    for what, one, invalid in todo
+                ]
+                res = [
+                    (fut.exception(), (None, None) if fut.exception() else fut.result())
+                    for fut in futs
+                ]
+            rec["rows"] = len(res)
+        return res
+
     def _dbm_short_info(self, what) -> str:
         """ Returns the short information of table 'what'. """
         return f"{what}=#{len(self.dbm[what].get_rows())}"
@@ -361,6 +472,58 @@ class MiLot(MiAny):
         return False
 
 
+class Credential:
+    """ One account: title, username, pass reference, password (None if missing),
+    and rank number (None if not at rank.mi).
+    """
+    __slots__ = ("title", "user", "pass_ref", "passwd", "rank")
+
+    def __init__(self, title, user, pass_ref, passwd, rank):
+        self.title, self.user, self.pass_ref = title, user, pass_ref
+        self.passwd, self.rank = passwd, rank
+
+    def rank_num(self) -> int:
+        return DEF_RANK_WHEN_MISSING if self.rank is None else self.rank
+
+    def rank_key(self) -> tuple:
+        """ Rank order: rank number, then title. """
+        return self.rank_num(), self.title
+
+    def pair(self, pass_text="plain") -> tuple:
+        """ Returns (username, password), or (username, pass_ref) if not 'plain'. """
+        if pass_text != "plain":
+            return self.user, self.pass_ref
+        if self.passwd is None:
+            return self.user, "*" + self.pass_ref
+        return self.user, self.passwd
+
+    def __repr__(self):
+        return f"Credential({self.title!r}, {self.user!r}, {self.pass_ref!r}, rank={self.rank})"
+
+
+def load_table(what, fname, invalid_chrs, profiler=None, echo=True) -> tuple:
+    """ Reads and hashes one table, returns (code, tbl):
+    code 0 if ok, 3 if the file is not well formatted, 1 if hash_key() failed.
+    """
+    prof = Profiler(False) if profiler is None else profiler
+    with prof.phase(f"read.{what}") as rec:
+        if what in ("pmap",):
+            tbl = stable.STableKey(fname, "")
+        else:
+            unique = what in TBL_W_UNIQUE_KEYS
+            s_val_join = ";" if what in ALT_NAMES else "="
+            tbl = stable.STableKey(fname, s_val_join, unique)
+        rec["rows"] = max(0, len(tbl.get_rows()) - 1)	# w/o header
+    if tbl.get_msg():
+        return 3, tbl
+    tbl.echo_errors = echo
+    with prof.phase(f"parse.{what}") as rec:
+        is_ok = tbl.hash_key(invalid_chrs)
+        rec["rows"] = len(tbl.get_key_list()) if is_ok else 0
+    tbl.echo_errors = True
+    return (0 if is_ok else 1), tbl
+
+
 def build_path(path, rel) -> str:
     """ Returns the complete file path. """
     return fileaccess.path_join(path, rel)
@@ -14,8 +14,6 @@ import pword
 from pword import PConfig, MiLot, mprint
 from pword import fileaccess
 
-DEF_RANK_WHEN_MISSING = 4
-
 
 def main():
     """ Main (non-interactive) script """
@@ -223,7 +221,7 @@ def dump_look(title, lookup, verbose=1):
                 f"{title} (INFO): {lookup.split(',')}"
                 if verbose >= 4
                 else
-                f"{title}: {lookup.split(";", 1)[1:][0].split(",")}"
+                f"{title}: {lookup.split(';', 1)[1:][0].split(',')}"
             )
         else:
             print("INFO:", lookup)
@@ -267,32 +265,21 @@ def best_matches(mis, a_filter, similar, debug=0) -> tuple:
 def best_rank_match(mis, a_filter=None, show_pass="plain", debug=0):
     """ Returns credentials sorted by rank (1..9). 0 means ignored.
     Lower rank number = higher priority.
-    When rank.mi has no score for an account, consider 4 (DEF_RANK_WHEN_MISSING)
+    When rank.mi has no score for an account, consider 4 (milot.DEF_RANK_WHEN_MISSING)
     """
     assert show_pass in ("plain", "ref"), f"show_pass={repr(show_pass)}"
-    # Get normal credential list
-    creds = mis.credentials(
-        a_filter=a_filter,
-        if_single=False,
-    )
-    rank_tbl = mis.dbm["rank"]
-    ranks = rank_tbl.keyval[0]   # dict: title -> rank_string
-    # Attach rank to each credential
-    ranked = []
-    for title, pair in creds:
-        a_rank = ranks.get(title, str(DEF_RANK_WHEN_MISSING))
-        rnum = int(a_rank.split("=", maxsplit=1)[0])
-        mprint(debug, f"best_rank_match(), rank={rnum}: title, pair={[title, pair]}")
+    # Get normal credential list; ranks come with each credential
+    creds = [(rec.title, rec.pair()) for rec in mis.matching(a_filter)]
+    # By rank number, then title (see Credential.rank_key)
+    tries = []
+    for rec in mis.matching(a_filter, by_rank=True):
+        rnum = rec.rank_num()
+        if debug:
+            mprint(debug, f"best_rank_match(), rank={rnum}: title, pair={[rec.title, rec.pair()]}")
         if rnum <= 0:
             continue
-        ranked.append((rnum, title, pair))
-        mprint(debug, "best_rank_match(), added:", ranked[-1])
-    # Sort by rank number, then title
-    ranked.sort(key=lambda x: (x[0], x[1]))
-    # Strip rank from output
-    tries = [
-        (title, pair) for (rnum, title, pair) in ranked
-    ]
+        tries.append((rec.title, rec.pair()))
+        mprint(debug, "best_rank_match(), added:", (rnum, *tries[-1]))
     return tries, creds
 
 
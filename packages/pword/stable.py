@@ -5,6 +5,8 @@ Easy simple text tables
 """
 # pylint: disable=missing-function-docstring, unused-argument
 
+import zlib
+
 _ONLY_TXT_NL = True  # True: means, *no* CR in text files!
 
 
@@ -13,6 +15,8 @@ class STable():
     _origin = ""
     _rows = []
     _msg = ""
+    _checksum = (0, 0)
+    echo_errors = True	# False: errors are only kept (see get_msg())
 
     def exists(self) -> bool:
         """ Returns True if original filename exists. """
@@ -31,10 +35,15 @@ class STable():
     def get_origin_file(self):
         return self._origin
 
+    def get_checksum(self) -> tuple:
+        """ Returns (size, crc32) of the file content as read. """
+        return self._checksum
+
     def _set_error(self, msg) -> bool:
         if not msg:
             return False
-        print(f"Error: {msg}")
+        if self.echo_errors:
+            print(f"Error: {msg}")
         self._msg = msg
         return True
 
@@ -64,15 +73,14 @@ class STableText(STable):
     def _add_from_file(self, fname) -> bool:
         self._origin, self._msg = fname, "Too short"
         is_ok = True
+        with open(fname, "rb") as f_in:
+            raw = f_in.read()
+        self._checksum = (len(raw), zlib.crc32(raw))
         if _ONLY_TXT_NL:
-            with open(fname, "rb") as f_temp:
-                data = f_temp.read()
-                if len(data) < 2:
-                    return False
-                is_ok = chr(data[-1]) == "\n" and chr(data[-2]) > ' '
-                f_temp.close()
-        with open(fname, "r", encoding="ISO-8859-1") as f_in:
-            data = f_in.read().splitlines()
+            if len(raw) < 2:
+                return False
+            is_ok = chr(raw[-1]) == "\n" and chr(raw[-2]) > ' '
+        data = raw.decode("ISO-8859-1").splitlines()
         for row in data:
             self._rows.append(row)
         self._msg = "" if is_ok else f"Bad-formatted-text: {fname}"
@@ -96,6 +104,7 @@ class STableKey(STableText):
         else:
             self._rows = ["#"]
         self.keyval = (None, None, None)
+        self.upper_keys = {}	# key.upper() -> key, see _hash_keys()
         if s_val_join is None:
             self._s_val_join = ";"
         else:
@@ -121,6 +130,10 @@ class STableKey(STableText):
         assert alist is not None
         return alist
 
+    def upper_match(self, key):
+        """ Returns the key equal to 'key' apart from (ASCII) case, or None. """
+        return self.upper_keys.get(key.upper())
+
     def get_key_names(self) -> tuple:
         """ Returns the key names. """
         heads = self.get_header()
@@ -147,6 +160,7 @@ class STableKey(STableText):
         """ Reloads data from file. """
         prev_header = self.get_header()
         self.keyval = (None, None, None)
+        self.upper_keys = {}
         self._rows = []
         is_ok = self._add_from_file(self._origin)
         if not is_ok:
@@ -171,7 +185,7 @@ class STableKey(STableText):
         # pylint: disable=invalid-name
         inv_chars = self._get_basic_invalid(invalid_chrs)
         spl_chr = self._splitter
-        key_to, from_name = {}, {}
+        key_to, from_name, ups = {}, {}, {}
         head = self._rows[0]
         rows = self._rows[1:]
         assert head.startswith("#")
@@ -208,6 +222,7 @@ class STableKey(STableText):
                         a_msg = f"Key char not ASCII7: {ord(a_chr)}d = 0x{ord(a_chr):02x}"
                         return not self._set_error(a_msg)
             key_to[k1] = k2
+            ups.setdefault(k1.upper(), k1)
             if self._unique_k2 and k2 in from_name:
                 self._set_error(f"Duplicate value: '{k2}'")
                 return False
@@ -226,6 +241,7 @@ class STableKey(STableText):
         else:
             assert sort_as == "x"
         self.keyval = (key_to, from_name, ordered)
+        self.upper_keys = ups
         return True
 
     def _get_basic_invalid(self, invalid_chrs):
@@ -0,0 +1,77 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+""" Simple text tables; lib: stable.py
+
+Author: Henrique Moreira, henrique@declaratived.com
+"""
+
+import os
+import sys
+import tempfile
+from pword.stable import STableKey
+
+# pylint: disable=missing-function-docstring
+
+ACCS_TEXT = """#Account;Data
+My Bank;1
+Other;2
+"""
+
+
+def main():
+    """ Main run """
+    code = run_main(sys.stdout, sys.argv[1:])
+    if code is None:
+        print(f"""{__file__} command [options]
+
+upper         Check upper-case key matching (fix-case hints)
+""")
+    sys.exit(0 if code is None else code)
+
+
+def run_main(out, args):
+    """ Args parser, run command! """
+    if not args:
+        return None
+    cmd = args[0]
+    param = args[1:]
+    if param:
+        return None
+    if cmd == "upper":
+        return run_upper(out)
+    return None
+
+
+def run_upper(out) -> int:
+    """ Keys differing only in case match; keys differing in blanks do not. """
+    accs = _table_from(ACCS_TEXT)
+    assert accs.hash_key(), accs.get_msg()
+    expected = (
+        ("My Bank", "My Bank"),
+        ("my bank", "My Bank"),
+        ("MY BANK", "My Bank"),
+        ("MYBANK", None),
+        ("My  Bank", None),
+        ("MyBank", None),
+        ("OTHER", "Other"),
+    )
+    code = 0
+    for key, there in expected:
+        got = accs.upper_match(key)
+        shown = "OK" if got == there else "FAIL"
+        out.write(f"{shown}: upper_match({key!r}) = {got!r}\n")
+        if got != there:
+            code = 1
+    return code
+
+
+def _table_from(text):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "accs.txt")
+        with open(path, "w", encoding="ascii") as fdout:
+            fdout.write(text)
+        return STableKey(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# titleindex.py  (c)2026  Henrique Moreira
+
+""" Account title search: sorted prefixes, and trigrams for '@substring'
+"""
+
+# pylint: disable=missing-function-docstring
+
+from array import array
+from bisect import bisect_left
+from passdb.pquery import append_to
+
+_MAX_CHR = chr(0x10FFFF)
+
+
+class TitleIndex:
+    """ Case-insensitive index over titles (upper-cased, as MiLot compares them).
+    find() returns title positions, in the original order.
+    Trigram postings are only built by the first '@substring' search.
+    """
+
+    def __init__(self, titles):
+        self._ups = [title.upper() for title in titles]
+        order = sorted(range(len(self._ups)), key=self._ups.__getitem__)
+        self._sorted = [self._ups[idx] for idx in order]
+        self._sorted_pos = array("I", order)
+        self._grams, self._parts, self._short = None, None, None	# see _build_grams()
+
+    def __len__(self):
+        return len(self._ups)
+
+    def find(self, a_filter) -> list:
+        """ Same matches as MiLot._show_title(), ignoring case:
+        titles starting with 'a_filter', or containing what follows '@'.
+        """
+        if a_filter is None:
+            return list(range(len(self._ups)))
+        flt = a_filter.upper()
+        if not flt:
+            return list(range(len(self._ups)))
+        res = set(self.prefixed(flt))
+        if flt.startswith("@"):
+            res.update(self.containing(flt[1:]))
+        return sorted(res)
+
+    def prefixed(self, flt):
+        """ Returns positions of titles starting with 'flt' (upper-case), by bisect. """
+        low = bisect_left(self._sorted, flt)
+        high = bisect_left(self._sorted, flt + _MAX_CHR, low)
+        return self._sorted_pos[low:high]
+
+    def containing(self, sub) -> list:
+        """ Returns positions of titles containing 'sub' (upper-case).
+        Candidates are the intersection of the trigram posting lists;
+        for 1 or 2 chars, the union of the trigrams containing 'sub'.
+        """
+        ups = self._ups
+        if not sub:
+            return list(range(len(ups)))
+        if self._grams is None:
+            self._build_grams()
+        if len(sub) < 3:
+            cands = set(self._short)
+            for gram in self._parts.get(sub, ()):
+                cands.update(self._grams[gram])
+            return [idx for idx in cands if sub in ups[idx]]
+        posts = sorted(
+            (self._grams.get(sub[pos:pos + 3], ()) for pos in range(len(sub) - 2)),
+            key=len,
+        )
+        cands = set(posts[0])
+        for post in posts[1:]:
+            if not cands:
+                break
+            cands.intersection_update(post)
+        return [idx for idx in cands if sub in ups[idx]]
+
+    def _build_grams(self):
+        grams = {}
+        for idx, upt in enumerate(self._ups):
+            for gram in {upt[pos:pos + 3] for pos in range(len(upt) - 2)}:
+                there = grams.get(gram)
+                if there is None:
+                    grams[gram] = [idx]
+                else:
+                    there.append(idx)
+        self._grams = {gram: array("I", lst) for gram, lst in grams.items()}
+        # Shorter sub-strings: the trigrams they are part of, and titles too short for any
+        self._parts = {}
+        for gram in self._grams:
+            for part in {gram[pos:pos + size] for size in (1, 2) for pos in range(4 - size)}:
+                append_to(self._parts, part, gram)
+        self._short = [idx for idx, upt in enumerate(self._ups) if len(upt) < 3]